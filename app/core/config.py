@@ -1,3 +1,6 @@
+from typing import Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -9,6 +12,95 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 2       
 
+    # Claims mode: access tokens carry role and tenant scope, so requests
+    # authenticate without a user lookup. Keep their lifetime short.
+    ACCESS_TOKEN_CLAIMS_MODE: bool = False
+    CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+
+    # Used by the async routes; derived from DATABASE_URL when unset
+    # (asyncpg for PostgreSQL, aiosqlite for SQLite)
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool, applied to the sync and async engines alike.
+    # Connections older than DB_POOL_RECYCLE seconds are replaced and
+    # pre-ping drops ones the server has closed.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Excel import: rows read, validated and written per chunk
+    IMPORT_BATCH_SIZE: int = 1000
+
+    # Background import jobs: worker threads and where uploads and
+    # error reports are kept (defaults to a temp directory)
+    IMPORT_JOB_WORKERS: int = 2
+    IMPORT_JOB_DIR: Optional[str] = None
+    # a queued/running job silent for this long is treated as dead and
+    # can be resumed by uploading the same file again
+    IMPORT_JOB_STALE_SECONDS: int = 300
+
+    # Bulk password hashing worker processes: 0 uses one per available
+    # CPU, at most 4; set it to match a container's CPU quota
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_PARALLEL_MIN: int = 32
+    # Threads that run sync routes and dependencies (AnyIO's default
+    # limiter, applied at startup)
+    REQUEST_THREADPOOL_SIZE: int = 40
+
+    # Request-path bcrypt (login, user create/update) runs on its own
+    # threads; past workers + queue size waiting calls, requests get a
+    # 503. Each admitted call holds its request thread until the hash is
+    # done, so the sum may be at most a quarter of REQUEST_THREADPOOL_SIZE.
+    PASSWORD_HASH_REQUEST_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 6
+
+    # Login attempts allowed per email and per client IP within a
+    # sliding window, checked before the password. Counters live in
+    # process memory, or in LOGIN_RATE_LIMIT_DB (a SQLite file) to be
+    # shared by the workers of one host.
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    LOGIN_RATE_LIMIT_EMAIL_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_LIMIT_PER_IP: int = 100
+    LOGIN_RATE_LIMIT_IP_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    LOGIN_RATE_LIMIT_DB: Optional[str] = None
+
+    # Authenticated principals cached per process by user id;
+    # a size of 0 disables the cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Activity logs are queued and written in batches of
+    # LOG_BUFFER_BATCH_SIZE, at least every LOG_BUFFER_FLUSH_SECONDS.
+    # A full queue blocks the request up to LOG_BUFFER_PUT_TIMEOUT
+    # seconds, then the entry is written synchronously.
+    LOG_BUFFER_ENABLED: bool = True
+    LOG_BUFFER_MAX_SIZE: int = 10000
+    LOG_BUFFER_BATCH_SIZE: int = 500
+    LOG_BUFFER_FLUSH_SECONDS: float = 1.0
+    LOG_BUFFER_PUT_TIMEOUT: float = 0.5
+
+    # Activity log partitions (PostgreSQL): months created ahead, and
+    # months kept before a partition is archived to ACTIVITY_LOG_ARCHIVE_DIR
+    # and dropped (0 keeps everything)
+    ACTIVITY_LOG_PARTITIONS_AHEAD: int = 3
+    ACTIVITY_LOG_RETENTION_MONTHS: int = 12
+    ACTIVITY_LOG_ARCHIVE_DIR: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_password_hash_slots(self):
+        slots = self.PASSWORD_HASH_REQUEST_WORKERS + self.PASSWORD_HASH_QUEUE_SIZE
+        if slots > self.REQUEST_THREADPOOL_SIZE // 4:
+            raise ValueError(
+                "PASSWORD_HASH_REQUEST_WORKERS + PASSWORD_HASH_QUEUE_SIZE "
+                f"({slots}) must be at most a quarter of "
+                f"REQUEST_THREADPOOL_SIZE ({self.REQUEST_THREADPOOL_SIZE})"
+            )
+        return self
+
     class Config:
         env_file = ".env"
 
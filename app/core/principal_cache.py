@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+# User fields embedded in claims-mode access tokens (plus the password,
+# whose change should log other sessions out)
+TOKEN_CLAIM_FIELDS = {"role", "organisation_id", "department_id", "email", "password"}
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What a request needs to know about its caller. Detached from any
+    session, so it is safe to cache and to hand to worker threads."""
+
+    id: UUID
+    role: str
+    organisation_id: Optional[UUID]
+    department_id: Optional[UUID]
+    email: str
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            organisation_id=user.organisation_id,
+            department_id=user.department_id,
+            email=user.email,
+            token_version=user.token_version or 0,
+        )
+
+    def to_claims(self) -> dict:
+        return {
+            "sub": str(self.id),
+            "role": self.role,
+            "org": str(self.organisation_id) if self.organisation_id else None,
+            "dept": str(self.department_id) if self.department_id else None,
+            "email": self.email,
+            "ver": self.token_version,
+        }
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        return cls(
+            id=UUID(payload["sub"]),
+            role=payload["role"],
+            organisation_id=UUID(payload["org"]) if payload.get("org") else None,
+            department_id=UUID(payload["dept"]) if payload.get("dept") else None,
+            email=payload["email"],
+            token_version=int(payload["ver"]),
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU of principals by user id, each entry living at most
+    ttl seconds.
+
+    The cache is per process: routes that change a user's role, org or
+    department invalidate it here, and the TTL bounds how long other
+    processes can keep serving the old principal.
+
+    It also remembers the latest token_version revoked per user, so
+    claims-mode tokens minted before a change are rejected by this
+    process without a lookup; elsewhere their short expiry applies.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._versions: "OrderedDict[UUID, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: Optional[UUID]):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def revoke(self, user_id: UUID, token_version: int):
+        """Drop the user's entry and reject tokens older than token_version."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions[user_id] = max(
+                token_version, self._versions.get(user_id, 0)
+            )
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > max(self.max_size, 1):
+                self._versions.popitem(last=False)
+
+    def is_revoked(self, principal: Principal) -> bool:
+        with self._lock:
+            return principal.token_version < self._versions.get(principal.id, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
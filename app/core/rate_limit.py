@@ -0,0 +1,258 @@
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+class RateLimitStore(ABC):
+    """Attempt counters per (key, bucket), where a bucket is one fixed
+    window. Implementations only count; SlidingWindowLimiter decides."""
+
+    @abstractmethod
+    def get(self, key: str, bucket: int) -> Tuple[int, int]:
+        """Counts of the previous and the current bucket."""
+
+    @abstractmethod
+    def add(self, key: str, bucket: int, expires_at: float) -> Tuple[int, int]:
+        """Count one attempt in bucket, atomically, and return the counts
+        as get would. The counters may be dropped after expires_at."""
+
+    @abstractmethod
+    def clear(self):
+        """Forget every counter."""
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Counters in this process: an LRU of at most max_keys keys, each
+    holding only its last two buckets."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._counts: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shift(entry, bucket: int) -> Tuple[int, int]:
+        if entry is None:
+            return 0, 0
+        last_bucket, previous, current = entry
+        if last_bucket == bucket:
+            return previous, current
+        if last_bucket == bucket - 1:
+            return current, 0
+        return 0, 0
+
+    def get(self, key: str, bucket: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._shift(self._counts.get(key), bucket)
+
+    def add(self, key: str, bucket: int, expires_at: float) -> Tuple[int, int]:
+        with self._lock:
+            previous, current = self._shift(self._counts.get(key), bucket)
+            self._counts[key] = (bucket, previous, current + 1)
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_keys:
+                self._counts.popitem(last=False)
+            return previous, current + 1
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """Counters in a SQLite file, so every worker process on the host
+    sees the same counts. They are disposable, so the file is written
+    without fsync; expired rows are pruned every prune_every adds."""
+
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.path = path
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._adds = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT NOT NULL, bucket INTEGER NOT NULL, "
+            "count INTEGER NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (key, bucket))"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, bucket: int) -> Tuple[int, int]:
+        rows = dict(
+            self._connection().execute(
+                "SELECT bucket, count FROM rate_limits "
+                "WHERE key = ? AND bucket IN (?, ?)",
+                (key, bucket - 1, bucket),
+            )
+        )
+        return rows.get(bucket - 1, 0), rows.get(bucket, 0)
+
+    def add(self, key: str, bucket: int, expires_at: float) -> Tuple[int, int]:
+        conn = self._connection()
+        # one write transaction: no other process can count in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (current,) = conn.execute(
+                "INSERT INTO rate_limits (key, bucket, count, expires_at) "
+                "VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (key, bucket) DO UPDATE SET count = count + 1 "
+                "RETURNING count",
+                (key, bucket, expires_at),
+            ).fetchone()
+            previous = conn.execute(
+                "SELECT count FROM rate_limits WHERE key = ? AND bucket = ?",
+                (key, bucket - 1),
+            ).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._adds += 1
+        if self._adds % self.prune_every == 0:
+            conn.execute(
+                "DELETE FROM rate_limits WHERE expires_at < ?", (time.time(),)
+            )
+
+        return (previous[0] if previous else 0), current
+
+    def clear(self):
+        self._connection().execute("DELETE FROM rate_limits")
+
+
+class SlidingWindowLimiter:
+    """At most limit attempts per key in any window seconds.
+
+    Uses the sliding window counter approximation: the previous fixed
+    window's count, weighted by how much of it still overlaps the
+    sliding window, plus the current window's count. Two counters per
+    key, whatever the limit. Refused attempts are not counted.
+    """
+
+    def __init__(self, store: RateLimitStore, name: str, limit: int, window: int):
+        self.store = store
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def _estimate(self, previous: int, current: int, now: float) -> float:
+        overlap = 1 - (now % self.window) / self.window
+        return previous * overlap + current
+
+    def check(self, key: str, now: Optional[float] = None) -> Optional[int]:
+        """Whether an attempt for key would be allowed, without counting
+        it: None, or the seconds to wait before retrying."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+
+        counts = self.store.get(f"{self.name}:{key}", bucket)
+        if self._estimate(*counts, now) + 1 > self.limit:
+            return self._retry_after(*counts, now)
+        return None
+
+    def hit(self, key: str, now: Optional[float] = None) -> Optional[int]:
+        """Count an attempt for key. Returns None when it is allowed,
+        otherwise the seconds to wait before retrying."""
+        now = time.time() if now is None else now
+
+        # over the limit: refused on a read, nothing written
+        retry_after = self.check(key, now)
+        if retry_after is not None:
+            return retry_after
+
+        # checked again after counting, for concurrent attempts
+        bucket = int(now // self.window)
+        counts = self.store.add(
+            f"{self.name}:{key}", bucket, (bucket + 2) * self.window
+        )
+        if self._estimate(*counts, now) > self.limit:
+            return self._retry_after(*counts, now)
+        return None
+
+    def _retry_after(self, previous: int, current: int, now: float) -> int:
+        """Seconds until one more attempt fits: until the previous
+        window's weight has dropped enough, in this window or, when the
+        current count alone is too high, in the next one."""
+        if previous and current + 1 <= self.limit:
+            # previous * (1 - offset / window) + current + 1 <= limit
+            excess = previous + current + 1 - self.limit
+            at = self.window * excess / previous
+        else:
+            # the current count becomes the previous window's
+            at = self.window
+            if current + 1 > self.limit:
+                at += self.window * (current + 1 - self.limit) / current
+        return max(1, math.ceil(at - now % self.window))
+
+
+def make_store() -> RateLimitStore:
+    if settings.LOGIN_RATE_LIMIT_DB:
+        return SQLiteRateLimitStore(settings.LOGIN_RATE_LIMIT_DB)
+    return MemoryRateLimitStore(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+login_rate_store = make_store()
+
+login_limiters = (
+    SlidingWindowLimiter(
+        login_rate_store,
+        "login-email",
+        settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+        settings.LOGIN_RATE_LIMIT_EMAIL_WINDOW_SECONDS,
+    ),
+    SlidingWindowLimiter(
+        login_rate_store,
+        "login-ip",
+        settings.LOGIN_RATE_LIMIT_PER_IP,
+        settings.LOGIN_RATE_LIMIT_IP_WINDOW_SECONDS,
+    ),
+)
+
+
+def check_login_rate(email: str, client_ip: Optional[str]):
+    """429 when email or client_ip has used up its login attempts."""
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+
+    email_limiter, ip_limiter = login_limiters
+    limits = [(ip_limiter, client_ip)] if client_ip else []
+    limits.append((email_limiter, email))
+
+    # an attempt refused by either limiter counts against neither, so
+    # spraying from one address cannot lock out the emails it targets
+    retry_after = None
+    for limiter, key in limits:
+        retry_after = limiter.check(key)
+        if retry_after is not None:
+            break
+    else:
+        for limiter, key in limits:
+            retry_after = limiter.hit(key)
+            if retry_after is not None:
+                break
+
+    if retry_after is not None:
+        raise HTTPException(
+            429,
+            "Too many login attempts, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
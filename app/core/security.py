@@ -1,12 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError, ExpiredSignatureError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional, Tuple
 from uuid import UUID
 
-from app.database.db import get_db
+from app.database.db import get_async_db, get_db
 from app.models.user import User
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
 
 
 bearer_scheme = HTTPBearer(auto_error=True)
@@ -18,7 +21,7 @@ credentials_exception = HTTPException(
 )
 
 
-def decode_token(token: str) -> str:
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token,
@@ -26,11 +29,10 @@ def decode_token(token: str) -> str:
             algorithms=[settings.ALGORITHM],
         )
 
-        user_id = payload.get("sub")
-        if not user_id:
+        if not payload.get("sub"):
             raise credentials_exception
 
-        return user_id
+        return payload
 
     except ExpiredSignatureError:
         raise HTTPException(
@@ -44,35 +46,83 @@ def decode_token(token: str) -> str:
 
 
 
+def resolve_token(raw_token: str) -> Tuple[Optional[Principal], UUID]:
+    """The token's Principal when the claims or the cache provide it
+    (None otherwise), and the user id to look up in that case."""
+    payload = decode_token(raw_token)
+
+    if settings.ACCESS_TOKEN_CLAIMS_MODE and "role" in payload:
+        principal = principal_from_claims(payload)
+        return principal, principal.id
+
+    try:
+        user_id = UUID(payload["sub"])
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token format")
+
+    return principal_cache.get(user_id), user_id
+
+
+def cache_principal(user: Optional[User]) -> Principal:
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
+
+
 def get_current_user(
     db: Session = Depends(get_db),
     token: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-):
+) -> Principal:
+    """Resolve the bearer token to a Principal. Claims-mode tokens and
+    cached principals skip the database entirely; routes that need the
+    full user row must load it themselves."""
+    principal, user_id = resolve_token(token.credentials)
+    if principal:
+        return principal
 
-    raw_token = token.credentials
+    return cache_principal(db.query(User).filter(User.id == user_id).first())
 
-    user_id_str = decode_token(raw_token)
 
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Principal:
+    """get_current_user for async routes: the lookup goes through the
+    route's own AsyncSession, so a request takes one pooled connection
+    and no threadpool thread."""
+    principal, user_id = resolve_token(token.credentials)
+    if principal:
+        return principal
+
+    return cache_principal(await db.get(User, user_id))
+
+
+def principal_from_claims(payload: dict) -> Principal:
     try:
-        user_id = UUID(user_id_str)
+        principal = Principal.from_claims(payload)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token format")
 
-    user = db.query(User).filter(User.id == user_id).first()
-
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    if principal_cache.is_revoked(principal):
+        raise HTTPException(
+            status_code=401,
+            detail="Token revoked. Please log in again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
-    return user
+    return principal
 
 
-def require_superadmin(current_user: User = Depends(get_current_user)):
+def require_superadmin(current_user: Principal = Depends(get_current_user)):
     if current_user.role != "superadmin":
         raise HTTPException(403, "Superadmin access required")
     return current_user
 
 
-def require_org_admin(current_user: User = Depends(get_current_user)):
+def require_org_admin(current_user: Principal = Depends(get_current_user)):
     if current_user.role not in ["organisation_admin", "superadmin"]:
         raise HTTPException(
             status_code=403,
@@ -81,13 +131,24 @@ def require_org_admin(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+def check_role(current_user: Principal, roles: list) -> Principal:
+    if current_user.role.lower() not in [r.lower() for r in roles]:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Access denied — requires roles: {roles}",
+        )
+    return current_user
+
+
 def require_role(roles: list):
-    def checker(current_user: User = Depends(get_current_user)):
-        if current_user.role.lower() not in [r.lower() for r in roles]:
-            raise HTTPException(
-                status_code=403,
-                detail=f"Access denied — requires roles: {roles}",
-            )
-        return current_user
-
-    return checker
\ No newline at end of file
+    def checker(current_user: Principal = Depends(get_current_user)):
+        return check_role(current_user, roles)
+
+    return checker
+
+
+def require_role_async(roles: list):
+    async def checker(current_user: Principal = Depends(get_current_user_async)):
+        return check_role(current_user, roles)
+
+    return checker
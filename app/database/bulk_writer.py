@@ -0,0 +1,173 @@
+import io
+import uuid
+from datetime import datetime
+from typing import List, Optional, Set
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from app.core.principal_cache import TOKEN_CLAIM_FIELDS
+from app.models.user import User
+
+USER_COLUMNS = [
+    "id",
+    "first_name",
+    "last_name",
+    "age",
+    "email",
+    "password",
+    "role",
+    "organisation_id",
+    "department_id",
+    "created_at",
+]
+
+# Below this a COPY round trip costs more than it saves
+COPY_MIN_ROWS = 50
+
+
+def uses_copy(db: Session, rows) -> bool:
+    bind = db.get_bind()
+    return (
+        bind.dialect.name == "postgresql"
+        and bind.dialect.driver == "psycopg2"
+        and len(rows) >= COPY_MIN_ROWS
+    )
+
+
+def with_defaults(rows):
+    """Core inserts and COPY skip the ORM, so fill the Python-side
+    defaults of User here."""
+    now = datetime.utcnow()
+    return [{"id": uuid.uuid4(), "created_at": now, **row} for row in rows]
+
+
+# Dialects with INSERT ... ON CONFLICT, which bulk writes rely on
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+
+def claim_fields(update_fields: List[str]) -> List[str]:
+    """The updated fields carried by access tokens: an upsert that
+    changes any of them bumps token_version, so tokens minted with the
+    old values are rejected."""
+    return [field for field in update_fields if field in TOKEN_CLAIM_FIELDS]
+
+
+def insert_statement(db: Session, update_fields: Optional[List[str]] = None):
+    """INSERT ... ON CONFLICT (email) DO UPDATE (with update_fields) or
+    DO NOTHING, RETURNING the emails written. Run with executemany."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(
+            f"Bulk writing users needs one of {', '.join(SUPPORTED_DIALECTS)}, "
+            f"not {dialect}"
+        )
+
+    table = User.__table__
+    stmt = dialect_insert(table)
+    if update_fields:
+        set_ = {field: stmt.excluded[field] for field in update_fields}
+        claims = claim_fields(update_fields)
+        if claims:
+            changed = or_(
+                *(
+                    table.c[field].is_distinct_from(stmt.excluded[field])
+                    for field in claims
+                )
+            )
+            set_["token_version"] = case(
+                (changed, table.c.token_version + 1), else_=table.c.token_version
+            )
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.email], set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.email])
+    return stmt.returning(table.c.email)
+
+
+def bulk_write_users(
+    db: Session, rows: List[dict], update_fields: Optional[List[str]] = None
+) -> Set[str]:
+    """Write user rows in bulk inside the session's transaction.
+
+    On PostgreSQL (psycopg2) the rows are streamed with COPY into a
+    temporary staging table and moved into users with a single
+    INSERT ... SELECT ... ON CONFLICT (email). Elsewhere, and for small
+    batches, they go through one executemany INSERT ... ON CONFLICT.
+
+    With update_fields, existing emails get those fields updated (and
+    token_version bumped when a token claim changes); otherwise they
+    are skipped. Both paths return the skipped emails,
+    found by comparing the RETURNING emails with the input. Any other
+    failure raises, so callers can retry row by row inside savepoints.
+    """
+    rows = with_defaults(rows)
+
+    if uses_copy(db, rows):
+        return copy_users(db, rows, update_fields)
+
+    # Core statements on the session's connection: the ORM bulk path
+    # would re-process every row dict
+    result = db.connection().execute(insert_statement(db, update_fields), rows)
+    written = set(result.scalars())
+    return {row["email"] for row in rows} - written
+
+
+def copy_value(value) -> str:
+    """Encode a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_users(db: Session, rows: List[dict], update_fields=None) -> Set[str]:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_value(row.get(column)) for column in USER_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    columns = ", ".join(USER_COLUMNS)
+
+    if update_fields:
+        assignments = [f"{field} = EXCLUDED.{field}" for field in update_fields]
+        claims = claim_fields(update_fields)
+        if claims:
+            before = ", ".join(f"users.{field}" for field in claims)
+            after = ", ".join(f"EXCLUDED.{field}" for field in claims)
+            assignments.append(
+                f"token_version = CASE WHEN ({before}) IS DISTINCT FROM ({after}) "
+                "THEN users.token_version + 1 ELSE users.token_version END"
+            )
+        conflict = "DO UPDATE SET " + ", ".join(assignments)
+    else:
+        conflict = "DO NOTHING"
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS users_staging "
+            "(LIKE users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.execute("TRUNCATE users_staging")
+        cursor.copy_expert(
+            f"COPY users_staging ({columns}) FROM STDIN", buffer
+        )
+        cursor.execute(
+            f"INSERT INTO users ({columns}) SELECT {columns} FROM users_staging "
+            f"ON CONFLICT (email) {conflict} RETURNING email"
+        )
+        written = {email for (email,) in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    return {row["email"] for row in rows} - written
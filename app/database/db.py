@@ -1,13 +1,16 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.database.pool import pool_options
 
 # Database URL (from .env)
 DATABASE_URL = settings.DATABASE_URL
 
 
 # Connect to PostgreSQL using the URL in .env
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
 
 # Create a session for database operations
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -23,3 +26,47 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async drivers for the sync URLs we accept
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine = None
+_async_session_local = None
+
+
+def async_database_url(url: str) -> str:
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if not driver:
+        raise RuntimeError(f"No async driver configured for {url.drivername}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_sessionmaker():
+    """Built on first use, so deployments without an async driver
+    installed can still run the sync routes."""
+    global _async_engine, _async_session_local
+
+    if _async_session_local is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **pool_options(url, is_async=True))
+        # no implicit refresh after commit: that would be IO outside await
+        _async_session_local = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_local
+
+
+def get_async_engine():
+    """The async engine, or None while no async route has used it."""
+    return _async_engine
+
+
+# Async dependency, for the async routes and their AsyncSession services
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,5 +1,12 @@
-from fastapi import FastAPI, Request
-from app.database.db import Base, engine
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.database.db import Base, engine, get_db
 
 from app.routers.user_router import router as user_router
 from app.routers.auth_router import router as auth_router
@@ -7,9 +14,21 @@ from app.routers.organisation_router import router as org_router
 from app.routers.department_router import router as dept_router
 from app.routers.log_router import router as log_router
 from app.routers.import_router import router as import_router
+from app.routers.admin_router import router as admin_router
+from app.services.log_service import log_buffer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.REQUEST_THREADPOOL_SIZE
+    )
+    yield
+    # queued activity logs must not be lost on shutdown
+    await run_in_threadpool(log_buffer.close)
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 Base.metadata.create_all(bind=engine)
 
@@ -27,8 +46,16 @@ app.include_router(org_router)
 app.include_router(dept_router)
 app.include_router(log_router)
 app.include_router(import_router)
+app.include_router(admin_router)
 
 
+# Readiness probe: checks a pooled connection out and pings the database
 @app.get("/")
-def home():
-    return {"message": "Database connected!"}
+@app.get("/ready")
+def ready(db: Session = Depends(get_db)):
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception:
+        raise HTTPException(503, "Database unavailable")
+
+    return {"status": "ready", "database": "ok"}
@@ -0,0 +1,199 @@
+"""Maintain the monthly partitions of activity_logs (PostgreSQL).
+
+    python -m app.maintenance.activity_log_partitions [--dry-run]
+
+Creates the partitions for the coming months, so inserts never land in
+the default partition, and archives partitions older than the
+retention period: each one is detached, dumped to a gzipped CSV in the
+archive directory and dropped. Dropping a partition is constant time
+whatever its size, unlike a DELETE. Run it daily from cron.
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.database.db import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+PARENT = "activity_logs"
+DEFAULT_PARTITION = "activity_logs_default"
+PARTITION_NAME = re.compile(r"^activity_logs_(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def month_tables(conn) -> Dict[date, bool]:
+    """Every activity_logs_YYYY_MM table, mapped to whether it is still
+    attached (a detached one is left over from an interrupted archive)."""
+    attached = {
+        name
+        for (name,) in conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": PARENT},
+        )
+    }
+    tables = conn.execute(
+        text(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind IN ('r', 'p') AND relname LIKE 'activity\\_logs\\_%' "
+            "AND relnamespace = CAST(current_schema() AS regnamespace)"
+        )
+    )
+
+    months = {}
+    for (name,) in tables:
+        match = PARTITION_NAME.match(name)
+        if match:
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            months[month] = name in attached
+    return months
+
+
+def create_partition(conn, month: date):
+    """Create and attach month's partition, moving over any of its rows
+    that already landed in the default partition."""
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    conn.execute(
+        text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        )
+    )
+
+
+def archive_partition(engine: Engine, month: date, attached: bool, archive_dir: str):
+    name = partition_name(month)
+
+    if attached:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = path + ".partial"
+
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            with gzip.open(partial, "wt", encoding="utf-8", newline="") as out:
+                cursor.copy_expert(
+                    f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", out
+                )
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            cursor.close()
+
+        # only drop once the archive is safely on disk
+        os.replace(partial, path)
+        conn.execute(text(f"DROP TABLE {name}"))
+
+    return path
+
+
+def run(
+    engine: Engine = default_engine,
+    today: Optional[date] = None,
+    months_ahead: int = settings.ACTIVITY_LOG_PARTITIONS_AHEAD,
+    retention_months: int = settings.ACTIVITY_LOG_RETENTION_MONTHS,
+    archive_dir: Optional[str] = settings.ACTIVITY_LOG_ARCHIVE_DIR,
+    dry_run: bool = False,
+) -> List[str]:
+    """Returns a line per action taken (or planned, with dry_run)."""
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("activity_logs is only partitioned on PostgreSQL")
+
+    this_month = (today or datetime.utcnow().date()).replace(day=1)
+    actions = []
+
+    with engine.connect() as conn:
+        months = month_tables(conn)
+
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        if month in months:
+            continue
+
+        actions.append(f"create {partition_name(month)}")
+        if not dry_run:
+            with engine.begin() as conn:
+                create_partition(conn, month)
+
+    if retention_months > 0:
+        cutoff = add_months(this_month, -retention_months)
+
+        for month, attached in sorted(months.items()):
+            if month >= cutoff:
+                continue
+
+            if not archive_dir:
+                actions.append(
+                    f"skip {partition_name(month)}: no archive directory configured"
+                )
+                continue
+
+            actions.append(f"archive {partition_name(month)} to {archive_dir}")
+            if not dry_run:
+                archive_partition(engine, month, attached, archive_dir)
+
+    return actions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--months-ahead", type=int, default=settings.ACTIVITY_LOG_PARTITIONS_AHEAD
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+        help="archive partitions older than this many months (0 keeps all)",
+    )
+    parser.add_argument("--archive-dir", default=settings.ACTIVITY_LOG_ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    for action in run(
+        months_ahead=args.months_ahead,
+        retention_months=args.retention_months,
+        archive_dir=args.archive_dir,
+        dry_run=args.dry_run,
+    ):
+        print(action)
+
+
+if __name__ == "__main__":
+    main()
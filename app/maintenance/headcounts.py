@@ -0,0 +1,44 @@
+"""Recompute organisation and department headcounts.
+
+    python -m app.maintenance.headcounts [--dry-run]
+
+employees_count is maintained incrementally as users are created,
+moved and deleted. This recounts every organisation and department from
+one GROUP BY over users and corrects the rows that drifted (after
+manual SQL, say). Safe to run at any time; writes to users wait for it.
+"""
+
+import argparse
+from typing import Dict
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.db import engine as default_engine
+from app.services.headcount_service import recompute_headcounts
+
+
+def run(engine: Engine = default_engine, dry_run: bool = False) -> Dict[str, int]:
+    """Returns the number of wrong rows per table (fixed unless dry_run)."""
+    with sessionmaker(bind=engine)() as db:
+        fixed = recompute_headcounts(db, dry_run)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+    return fixed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    verb = "wrong" if args.dry_run else "fixed"
+    for table, count in run(dry_run=args.dry_run).items():
+        print(f"{table}: {count} {verb}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from app.models import user
 from app.models import organisation
 from app.models import department
 from app.models import refresh_token
+from app.models import import_job
 
 
 config = context.config
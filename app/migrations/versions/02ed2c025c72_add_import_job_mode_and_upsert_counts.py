@@ -0,0 +1,44 @@
+"""Add import job mode and upsert counts
+
+Revision ID: 02ed2c025c72
+Revises: ff97185f2ebe
+Create Date: 2026-10-18 11:26:51.730144
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "02ed2c025c72"
+down_revision: Union[str, Sequence[str], None] = "ff97185f2ebe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "import_jobs",
+        sa.Column("mode", sa.String(), nullable=False, server_default="insert"),
+    )
+    op.add_column(
+        "import_jobs",
+        sa.Column("updated_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "import_jobs",
+        sa.Column(
+            "unchanged_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("import_jobs", "unchanged_count")
+    op.drop_column("import_jobs", "updated_count")
+    op.drop_column("import_jobs", "mode")
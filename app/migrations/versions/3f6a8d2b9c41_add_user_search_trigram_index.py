@@ -0,0 +1,47 @@
+"""Add user search trigram index
+
+Revision ID: 3f6a8d2b9c41
+Revises: 1b9d47c3e8a6
+Create Date: 2026-10-18 16:47:13.582907
+
+PostgreSQL only (needs pg_trgm). The expression must stay identical to
+USER_SEARCH_TEXT in app/routers/user_router.py for the planner to use
+the index; SQLite searches without it.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6a8d2b9c41"
+down_revision: Union[str, Sequence[str], None] = "1b9d47c3e8a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # a GIN build over users takes a while: CONCURRENTLY keeps user
+    # writes going meanwhile
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_users_search_trgm ON users USING gin "
+            "(lower(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_search_trgm")
@@ -0,0 +1,32 @@
+"""Add user token_version
+
+Revision ID: 5c81d0b7e3a4
+Revises: 02ed2c025c72
+Create Date: 2026-10-18 13:04:17.502391
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c81d0b7e3a4"
+down_revision: Union[str, Sequence[str], None] = "02ed2c025c72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
@@ -0,0 +1,168 @@
+"""Store refresh tokens by SHA-256 hash
+
+Outstanding tokens are hashed in place, so nobody is logged out by the
+upgrade. The downgrade cannot recover tokens from their hashes and
+deletes every refresh token: all users have to log in again once their
+access token expires.
+
+Revision ID: 6e0b93d5a1c7
+Revises: d41a7c9e2f58
+Create Date: 2026-10-18 18:14:36.804512
+
+"""
+
+import hashlib
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6e0b93d5a1c7"
+down_revision: Union[str, Sequence[str], None] = "d41a7c9e2f58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # refresh_tokens comes from create_all; a fresh database gets the
+    # new layout from there
+    if not sa.inspect(bind).has_table("refresh_tokens"):
+        return
+    postgresql = bind.dialect.name == "postgresql"
+
+    op.add_column(
+        "refresh_tokens", sa.Column("token_hash", sa.LargeBinary(32), nullable=True)
+    )
+
+    # Every step commits on its own, so /refresh and /logout keep
+    # working while the table is backfilled and indexed
+    with op.get_context().autocommit_block():
+        if postgresql:
+            backfill_in_database(op.get_bind())
+        else:
+            backfill_in_python(op.get_bind())
+
+        if postgresql:
+            # SET NOT NULL skips its full scan under an exclusive lock when
+            # a validated CHECK already proves it; VALIDATE lets writes run
+            op.execute(
+                "ALTER TABLE refresh_tokens ADD CONSTRAINT "
+                "refresh_tokens_token_hash_not_null "
+                "CHECK (token_hash IS NOT NULL) NOT VALID"
+            )
+            op.execute(
+                "ALTER TABLE refresh_tokens "
+                "VALIDATE CONSTRAINT refresh_tokens_token_hash_not_null"
+            )
+            op.alter_column(
+                "refresh_tokens",
+                "token_hash",
+                existing_type=sa.LargeBinary(32),
+                nullable=False,
+            )
+            op.drop_constraint(
+                "refresh_tokens_token_hash_not_null", "refresh_tokens", type_="check"
+            )
+            op.create_index(
+                "ix_refresh_tokens_token_hash",
+                "refresh_tokens",
+                ["token_hash"],
+                unique=True,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                "ix_refresh_tokens_token",
+                table_name="refresh_tokens",
+                postgresql_concurrently=True,
+            )
+            op.drop_column("refresh_tokens", "token")
+
+    if not postgresql:
+        with op.batch_alter_table("refresh_tokens") as batch_op:
+            batch_op.alter_column(
+                "token_hash", existing_type=sa.LargeBinary(32), nullable=False
+            )
+            batch_op.create_index(
+                "ix_refresh_tokens_token_hash", ["token_hash"], unique=True
+            )
+            batch_op.drop_index("ix_refresh_tokens_token")
+            batch_op.drop_column("token")
+
+
+def backfill_in_database(bind) -> None:
+    """Hash with PostgreSQL's sha256() in id order, one committed batch
+    at a time, then once more for tokens issued meanwhile."""
+    batch = sa.text(
+        "WITH batch AS (SELECT id FROM refresh_tokens WHERE id > :last_id "
+        "ORDER BY id LIMIT :batch) "
+        "UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8')) "
+        "FROM batch WHERE refresh_tokens.id = batch.id RETURNING refresh_tokens.id"
+    )
+    last_id = uuid.UUID(int=0)
+    while True:
+        ids = bind.execute(batch, {"last_id": last_id, "batch": BATCH_SIZE}).scalars()
+        last_id = max(ids, default=None)
+        if last_id is None:
+            break
+
+    bind.execute(
+        sa.text(
+            "UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8')) "
+            "WHERE token_hash IS NULL"
+        )
+    )
+
+
+def backfill_in_python(bind) -> None:
+    """Hash in Python, reading in id order one batch at a time so the
+    table never has to fit in memory."""
+    tokens = sa.table(
+        "refresh_tokens",
+        sa.column("id"),
+        sa.column("token", sa.String),
+        sa.column("token_hash", sa.LargeBinary),
+    )
+    update = (
+        tokens.update()
+        .where(tokens.c.id == sa.bindparam("row_id"))
+        .values(token_hash=sa.bindparam("digest"))
+    )
+    batch = sa.select(tokens.c.id, tokens.c.token).order_by(tokens.c.id)
+    last_id = None
+    while True:
+        query = batch if last_id is None else batch.where(tokens.c.id > last_id)
+        rows = bind.execute(query.limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        bind.execute(
+            update,
+            [
+                {
+                    "row_id": row_id,
+                    "digest": hashlib.sha256(token.encode()).digest(),
+                }
+                for row_id, token in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("refresh_tokens"):
+        return
+
+    # hashes cannot be turned back into tokens: everyone logs in again
+    op.execute("DELETE FROM refresh_tokens")
+    with op.batch_alter_table("refresh_tokens") as batch_op:
+        batch_op.add_column(sa.Column("token", sa.String(), nullable=False))
+        batch_op.create_index("ix_refresh_tokens_token", ["token"], unique=True)
+        batch_op.drop_index("ix_refresh_tokens_token_hash")
+        batch_op.drop_column("token_hash")
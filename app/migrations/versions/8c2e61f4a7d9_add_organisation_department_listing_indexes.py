@@ -0,0 +1,42 @@
+"""Add organisation and department listing indexes
+
+Revision ID: 8c2e61f4a7d9
+Revises: 3f6a8d2b9c41
+Create Date: 2026-10-18 17:02:41.518263
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e61f4a7d9"
+down_revision: Union[str, Sequence[str], None] = "3f6a8d2b9c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_organisations_name_id", "organisations", ["name", "id"], unique=False
+    )
+    op.create_index(
+        "ix_departments_organisation_name_id",
+        "departments",
+        ["organisation_id", "name", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_departments_name_id", "departments", ["name", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_departments_name_id", table_name="departments")
+    op.drop_index("ix_departments_organisation_name_id", table_name="departments")
+    op.drop_index("ix_organisations_name_id", table_name="organisations")
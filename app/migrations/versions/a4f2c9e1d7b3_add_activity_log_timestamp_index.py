@@ -0,0 +1,43 @@
+"""Add activity log timestamp index
+
+Revision ID: a4f2c9e1d7b3
+Revises: 5c81d0b7e3a4
+Create Date: 2026-10-18 14:02:36.218840
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f2c9e1d7b3"
+down_revision: Union[str, Sequence[str], None] = "5c81d0b7e3a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY on PostgreSQL, so log writes go on during the build;
+    # it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_activity_logs_timestamp_id",
+            "activity_logs",
+            ["timestamp", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_activity_logs_timestamp_id",
+            table_name="activity_logs",
+            postgresql_concurrently=True,
+        )
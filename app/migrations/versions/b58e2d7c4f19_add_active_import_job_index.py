@@ -0,0 +1,50 @@
+"""Add active import job index
+
+Revision ID: b58e2d7c4f19
+Revises: 6e0b93d5a1c7
+Create Date: 2026-10-18 19:41:07.215384
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b58e2d7c4f19"
+down_revision: Union[str, Sequence[str], None] = "6e0b93d5a1c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # duplicates left by concurrent uploads: keep the newest live job
+    op.execute(
+        "UPDATE import_jobs SET status = 'failed', "
+        "error = 'Superseded by a concurrent upload of the same file' "
+        "WHERE status IN ('queued', 'running') AND EXISTS ("
+        "SELECT 1 FROM import_jobs newer "
+        "WHERE newer.file_hash = import_jobs.file_hash "
+        "AND newer.mode = import_jobs.mode "
+        "AND newer.created_by = import_jobs.created_by "
+        "AND newer.status IN ('queued', 'running') "
+        "AND newer.created_at > import_jobs.created_at)"
+    )
+    op.create_index(
+        "ix_import_jobs_active_file",
+        "import_jobs",
+        ["file_hash", "mode", "created_by"],
+        unique=True,
+        postgresql_where=ACTIVE,
+        sqlite_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_import_jobs_active_file", table_name="import_jobs")
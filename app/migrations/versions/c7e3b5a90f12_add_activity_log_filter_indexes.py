@@ -0,0 +1,66 @@
+"""Add activity log filter indexes
+
+Revision ID: c7e3b5a90f12
+Revises: a4f2c9e1d7b3
+Create Date: 2026-10-18 14:41:09.663152
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e3b5a90f12"
+down_revision: Union[str, Sequence[str], None] = "a4f2c9e1d7b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    (
+        "ix_activity_logs_organisation_timestamp_id",
+        ["organisation_id", "timestamp", "id"],
+    ),
+    (
+        "ix_activity_logs_department_timestamp_id",
+        ["department_id", "timestamp", "id"],
+    ),
+    ("ix_activity_logs_user_timestamp_id", ["user_id", "timestamp", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY on PostgreSQL, so log writes go on during the builds;
+    # it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "activity_logs",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_activity_logs_action_timestamp",
+            "activity_logs",
+            ["action", "timestamp"],
+            unique=False,
+            postgresql_ops={"action": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ["ix_activity_logs_action_timestamp"] + [
+            name for name, _ in reversed(INDEXES)
+        ]:
+            op.drop_index(
+                name, table_name="activity_logs", postgresql_concurrently=True
+            )
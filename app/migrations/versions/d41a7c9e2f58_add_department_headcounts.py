@@ -0,0 +1,58 @@
+"""Add department headcounts
+
+Revision ID: d41a7c9e2f58
+Revises: 8c2e61f4a7d9
+Create Date: 2026-10-18 17:41:07.226904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d41a7c9e2f58"
+down_revision: Union[str, Sequence[str], None] = "8c2e61f4a7d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "departments",
+        sa.Column(
+            "employees_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+    # organisations.employees_count was never maintained: count from scratch
+    op.execute(
+        "UPDATE organisations SET employees_count = ("
+        "SELECT count(*) FROM users WHERE users.organisation_id = organisations.id)"
+    )
+    op.execute(
+        "UPDATE departments SET employees_count = ("
+        "SELECT count(*) FROM users WHERE users.department_id = departments.id)"
+    )
+    op.alter_column(
+        "organisations",
+        "employees_count",
+        existing_type=sa.Integer(),
+        nullable=False,
+        server_default="0",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "organisations",
+        "employees_count",
+        existing_type=sa.Integer(),
+        nullable=True,
+        server_default=None,
+    )
+    op.drop_column("departments", "employees_count")
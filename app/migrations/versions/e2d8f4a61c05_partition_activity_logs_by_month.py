@@ -0,0 +1,186 @@
+"""Partition activity_logs by month
+
+Revision ID: e2d8f4a61c05
+Revises: c7e3b5a90f12
+Create Date: 2026-10-18 15:20:47.904415
+
+PostgreSQL only: turns activity_logs into a table range-partitioned
+on timestamp, one partition per month, plus a default partition that
+catches rows outside every month created so far. Future partitions
+are created ahead of time (and old ones archived) by
+`python -m app.maintenance.activity_log_partitions`.
+
+Existing rows are copied in committed batches while activity_logs keeps
+taking writes; rows logged meanwhile are caught up, and only the last
+catch-up and the table swap run with writes blocked. The indexes
+a4f2c9e1d7b3 and c7e3b5a90f12 built CONCURRENTLY are recreated, not
+concurrently, on the new table while it is still empty.
+
+The downgrade copies every row back and rebuilds those indexes in one
+transaction with activity_logs locked: run it in a maintenance window.
+
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2d8f4a61c05"
+down_revision: Union[str, Sequence[str], None] = "c7e3b5a90f12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COPY_BATCH_SIZE = 10_000
+
+# The log buffer writes entries a little after their timestamp, so rows
+# logged during the copy are looked for from this long before it began
+CATCH_UP_MARGIN = timedelta(hours=1)
+
+CONSTRAINTS = ["pkey", "user_id_fkey", "organisation_id_fkey", "department_id_fkey"]
+
+COLUMNS = "id, user_id, organisation_id, department_id, action, timestamp"
+
+INDEXES = [
+    ("ix_activity_logs_timestamp_id", "(timestamp, id)"),
+    ("ix_activity_logs_organisation_timestamp_id", "(organisation_id, timestamp, id)"),
+    ("ix_activity_logs_department_timestamp_id", "(department_id, timestamp, id)"),
+    ("ix_activity_logs_user_timestamp_id", "(user_id, timestamp, id)"),
+    ("ix_activity_logs_action_timestamp", "(action text_pattern_ops, timestamp)"),
+]
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_table(table: str, partitioned: bool, index_suffix: str = "") -> None:
+    op.execute(
+        f"""
+        CREATE TABLE {table} (
+            id UUID NOT NULL,
+            user_id UUID REFERENCES users (id) ON DELETE CASCADE,
+            organisation_id UUID REFERENCES organisations (id) ON DELETE SET NULL,
+            department_id UUID REFERENCES departments (id) ON DELETE SET NULL,
+            action VARCHAR NOT NULL,
+            timestamp TIMESTAMP{" NOT NULL" if partitioned else ""},
+            {"PRIMARY KEY (id, timestamp)" if partitioned else "PRIMARY KEY (id)"}
+        ){" PARTITION BY RANGE (timestamp)" if partitioned else ""}
+        """
+    )
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name}{index_suffix} ON {table} {columns}")
+
+
+def catch_up(bind, since: datetime) -> None:
+    """Copy rows logged since `since` that activity_logs_new lacks."""
+    bind.execute(
+        sa.text(
+            f"INSERT INTO activity_logs_new ({COLUMNS}) "
+            f"SELECT {COLUMNS} FROM activity_logs old "
+            "WHERE old.timestamp >= :since AND NOT EXISTS ("
+            "SELECT 1 FROM activity_logs_new new "
+            "WHERE new.id = old.id AND new.timestamp = old.timestamp)"
+        ),
+        {"since": since},
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # activity_logs keeps taking writes while it is copied: every
+    # statement in this block commits on its own
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+
+        backfill = sa.text(
+            "UPDATE activity_logs SET timestamp = now() WHERE id IN "
+            "(SELECT id FROM activity_logs WHERE timestamp IS NULL LIMIT :batch)"
+        )
+        while bind.execute(backfill, {"batch": COPY_BATCH_SIZE}).rowcount:
+            pass
+
+        create_table("activity_logs_new", partitioned=True, index_suffix="_new")
+
+        oldest = bind.execute(
+            sa.text("SELECT min(timestamp) FROM activity_logs")
+        ).scalar()
+        this_month = datetime.utcnow().date().replace(day=1)
+        month = (oldest.date() if oldest else this_month).replace(day=1)
+
+        while month <= add_months(this_month, MONTHS_AHEAD):
+            op.execute(
+                f"CREATE TABLE activity_logs_{month:%Y_%m} "
+                "PARTITION OF activity_logs_new "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+            month = add_months(month, 1)
+
+        op.execute(
+            "CREATE TABLE activity_logs_default PARTITION OF activity_logs_new DEFAULT"
+        )
+
+        # copy in (timestamp, id) order, one committed batch at a time
+        started = datetime.utcnow()
+        copy = sa.text(
+            f"INSERT INTO activity_logs_new ({COLUMNS}) "
+            f"SELECT {COLUMNS} FROM activity_logs "
+            "WHERE (timestamp, id) > (:timestamp, :id) "
+            "ORDER BY timestamp, id LIMIT :batch "
+            "RETURNING timestamp, id"
+        )
+        last = (datetime.min, uuid.UUID(int=0))
+        while True:
+            keys = bind.execute(
+                copy, {"timestamp": last[0], "id": last[1], "batch": COPY_BATCH_SIZE}
+            ).all()
+            if not keys:
+                break
+            last = max(tuple(key) for key in keys)
+
+        # most rows logged during the copy, still without a lock
+        catch_up(bind, started - CATCH_UP_MARGIN)
+
+    # the swap: writes wait only for the last rows and the renames
+    op.execute("LOCK TABLE activity_logs IN EXCLUSIVE MODE")
+    catch_up(op.get_bind(), started - CATCH_UP_MARGIN)
+    op.drop_table("activity_logs")
+    op.rename_table("activity_logs_new", "activity_logs")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+    for constraint in CONSTRAINTS:
+        op.execute(
+            f"ALTER TABLE activity_logs RENAME CONSTRAINT "
+            f"activity_logs_new_{constraint} TO activity_logs_{constraint}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.rename_table("activity_logs", "activity_logs_partitioned")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+
+    create_table("activity_logs", partitioned=False)
+
+    op.execute(
+        "INSERT INTO activity_logs "
+        "(id, user_id, organisation_id, department_id, action, timestamp) "
+        "SELECT id, user_id, organisation_id, department_id, action, timestamp "
+        "FROM activity_logs_partitioned"
+    )
+    # drops every partition with it
+    op.drop_table("activity_logs_partitioned")
@@ -0,0 +1,47 @@
+"""Add import job checkpoints
+
+Revision ID: ff97185f2ebe
+Revises: 0ee58f719a63
+Create Date: 2026-10-18 10:03:17.402915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ff97185f2ebe"
+down_revision: Union[str, Sequence[str], None] = "0ee58f719a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "import_jobs", sa.Column("file_hash", sa.String(length=64), nullable=True)
+    )
+    op.add_column("import_jobs", sa.Column("chunk_size", sa.Integer(), nullable=True))
+    op.add_column(
+        "import_jobs",
+        sa.Column("chunks_done", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "import_jobs",
+        sa.Column("last_row", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        op.f("ix_import_jobs_file_hash"), "import_jobs", ["file_hash"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_import_jobs_file_hash"), table_name="import_jobs")
+    op.drop_column("import_jobs", "last_row")
+    op.drop_column("import_jobs", "chunks_done")
+    op.drop_column("import_jobs", "chunk_size")
+    op.drop_column("import_jobs", "file_hash")
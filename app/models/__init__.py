@@ -2,4 +2,5 @@ from .user import User
 from .organisation import Organisation
 from .department import Department
 from .refresh_token import RefreshToken
+from .import_job import ImportJob
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -8,6 +8,11 @@ from app.database.db import Base
 
 class Department(Base):
     __tablename__ = "departments"
+    __table_args__ = (
+        # listings page by (name, id), usually within one organisation
+        Index("ix_departments_organisation_name_id", "organisation_id", "name", "id"),
+        Index("ix_departments_name_id", "name", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -16,6 +21,8 @@ class Department(Base):
         UUID(as_uuid=True), ForeignKey("organisations.id"), nullable=False
     )
     manager_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    # kept up to date by headcount_service
+    employees_count = Column(Integer, nullable=False, default=0, server_default="0")
 
 
     organisation = relationship("Organisation", back_populates="departments")
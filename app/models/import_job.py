@@ -0,0 +1,53 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database.db import Base
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        # one live job per file, mode and user: concurrent uploads of the
+        # same file cannot both start a job
+        Index(
+            "ix_import_jobs_active_file",
+            "file_hash",
+            "mode",
+            "created_by",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    filename = Column(String, nullable=False)
+    mode = Column(String, nullable=False, default="insert")
+
+    # queued -> running -> completed | failed
+    status = Column(String, nullable=False, default="queued")
+    error = Column(String, nullable=True)
+
+    progress = Column(Float, nullable=False, default=0.0)
+    rows_done = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)
+    unchanged_count = Column(Integer, nullable=False, default=0)
+
+    # Checkpoint: the file, how it was chunked and how far it committed.
+    # Re-uploading the same file resumes after chunks_done.
+    file_hash = Column(String(64), nullable=True, index=True)
+    chunk_size = Column(Integer, nullable=True)
+    chunks_done = Column(Integer, nullable=False, default=0)
+    last_row = Column(Integer, nullable=False, default=0)
+
+    created_by = Column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
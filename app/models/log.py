@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,8 +7,36 @@ import uuid
 from app.database.db import Base
 
 
+# On PostgreSQL the table is range-partitioned by month on timestamp
+# (migration e2d8f4a61c05, app.maintenance.activity_log_partitions).
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # keyset pagination order: newest first, id breaks ties
+        Index("ix_activity_logs_timestamp_id", "timestamp", "id"),
+        # the same order within each filter, so a filtered page is
+        # still a single range scan
+        Index(
+            "ix_activity_logs_organisation_timestamp_id",
+            "organisation_id",
+            "timestamp",
+            "id",
+        ),
+        Index(
+            "ix_activity_logs_department_timestamp_id",
+            "department_id",
+            "timestamp",
+            "id",
+        ),
+        Index("ix_activity_logs_user_timestamp_id", "user_id", "timestamp", "id"),
+        # action prefix (LIKE 'x%') filters, whatever the collation
+        Index(
+            "ix_activity_logs_action_timestamp",
+            "action",
+            "timestamp",
+            postgresql_ops={"action": "text_pattern_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
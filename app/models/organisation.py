@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -8,11 +8,13 @@ from app.database.db import Base
 
 class Organisation(Base):
     __tablename__ = "organisations"
+    __table_args__ = (Index("ix_organisations_name_id", "name", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False, unique=True)
     address = Column(String, nullable=True)
-    employees_count = Column(Integer, default=0)
+    # kept up to date by headcount_service
+    employees_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     admin_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
 
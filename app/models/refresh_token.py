@@ -1,5 +1,5 @@
 # app/models/refresh_token.py
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, LargeBinary, Boolean, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -10,7 +10,7 @@ class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token = Column(String, unique=True, index=True, nullable=False)  # store token string (random uuid)
+    token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)  # sha256 of the token string
     user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     revoked = Column(Boolean, default=False, nullable=False)
     expires_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.database.db import Base
@@ -8,6 +8,19 @@ from sqlalchemy.orm import relationship
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # listing order (keyset pagination), overall and per tenant
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_users_organisation_created_at_id",
+            "organisation_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_users_department_created_at_id", "department_id", "created_at", "id"
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     first_name = Column(String, nullable=False)
@@ -16,6 +29,8 @@ class User(Base):
     email = Column(String, nullable=False, unique=True)
     password = Column(String, nullable=False)
     role = Column(String, nullable=False, default="Employee")
+    # bumped whenever role or scope changes, to revoke claims-mode tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     organisation_id = Column(
         UUID(as_uuid=True), ForeignKey("organisations.id"), nullable=True
@@ -37,4 +52,4 @@ class User(Base):
         passive_deletes=True,
     )
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+
+from app.core.security import require_superadmin
+from app.database.db import engine, get_async_engine
+from app.database.pool import pool_metrics
+from app.utils.hash import hashing_executor
+
+router = APIRouter(prefix="/api/v1/admin", tags=["Admin"])
+
+
+@router.get("/db-pool")
+def db_pool_metrics(current_user=Depends(require_superadmin)):
+    """
+    Live connection pool counters for the sync and async engines:
+    checked-out and idle connections, overflow in use, and how many
+    checkouts had to wait for a connection, for how long, and how many
+    of them timed out. async is null until an async route has run.
+    """
+    async_engine = get_async_engine()
+
+    return {
+        "sync": pool_metrics(engine),
+        "async": pool_metrics(async_engine.sync_engine) if async_engine else None,
+    }
+
+
+@router.get("/password-hashing")
+def password_hashing_metrics(current_user=Depends(require_superadmin)):
+    """
+    Request-path bcrypt executor: calls running and queued now, how long
+    calls waited for a hashing thread, and how many were shed with a 503
+    because the queue was full.
+    """
+    return hashing_executor.metrics()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from uuid import UUID
@@ -8,6 +8,7 @@ from app.database.db import get_db
 from app.services.auth_service import (login as login_service,refresh_access_token,logout)
 
 from app.core.security import get_current_user
+from app.core.principal_cache import principal_cache
 from app.models.user import User
 
 
@@ -20,10 +21,16 @@ class RefreshRequest(BaseModel):
 
 @router.post("/login")
 def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    return login_service(db, form_data.username, form_data.password)
+    """
+    Attempts are limited per email and per client IP (429 with
+    Retry-After once used up).
+    """
+    client_ip = request.client.host if request.client else None
+    return login_service(db, form_data.username, form_data.password, client_ip)
 
 
 
@@ -87,7 +94,9 @@ def make_admin(
         raise HTTPException(400, f"User already has role: {user.role}")
 
     user.role = "admin"
+    user.token_version += 1
     db.commit()
+    principal_cache.revoke(user.id, user.token_version)
 
     return {"message": f"{user.email} is now an admin"}
 
@@ -107,6 +116,8 @@ def make_organisation_admin(
         raise HTTPException(404, "User not found")
 
     user.role = "organisation_admin"
+    user.token_version += 1
     db.commit()
+    principal_cache.revoke(user.id, user.token_version)
 
     return {"message": f"{user.email} is now organisation admin"}
@@ -1,22 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.schemas.department_schema import (DepartmentCreate,DepartmentRead,DepartmentUpdate)
 
-from app.database.db import get_db
-from app.services.department_service import (create_department,list_departments,get_department,update_department,delete_department)
-from app.core.security import get_current_user
-from app.models.user import User
+from app.database.db import get_async_db
+from app.services.department_service import (create_department,list_departments,get_department,update_department,delete_department,check_manager,assign_manager,remove_manager)
+from app.core.security import get_current_user_async
 
 router = APIRouter(prefix="/api/v1/departments", tags=["Departments"])
 
 
 @router.post("/", response_model=DepartmentRead)
-def create_department_api(
+async def create_department_api(
     payload: DepartmentCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
     allowed_roles = ["superadmin", "organisation_admin"]
@@ -36,38 +36,62 @@ def create_department_api(
 
     # Manager validation (if provided)
     if payload.manager_id:
-        manager = db.query(User).filter(User.id == payload.manager_id).first()
+        await check_manager(db, payload.manager_id, payload.organisation_id)
 
-        if not manager:
-            raise HTTPException(404, "Manager user not found")
-
-        if manager.organisation_id != payload.organisation_id:
-            raise HTTPException(403, "Manager must belong to the same organisation")
-
-    return create_department(
+    return await create_department(
         db, payload.name, payload.organisation_id, payload.manager_id
     )
 
 
 @router.get("/", response_model=list[DepartmentRead])
-def list_departments_api(db: Session = Depends(get_db)):
-    return list_departments(db)
+async def list_departments_api(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    name: Optional[str] = Query(None, description="Name prefix"),
+    organisation_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """
+    Ordered by (name, id), paged with X-Next-Cursor like the other
+    listings. Everyone but the superadmin sees only their own
+    organisation's departments.
+    """
+    if current_user.role.lower() != "superadmin":
+        if organisation_id and organisation_id != current_user.organisation_id:
+            raise HTTPException(
+                403, "You can only view your organisation's departments"
+            )
+        if not current_user.organisation_id:
+            return []
+        organisation_id = current_user.organisation_id
+
+    departments, next_cursor = await list_departments(
+        db, limit, cursor, name, organisation_id
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return departments
 
 
 @router.get("/{department_id}", response_model=DepartmentRead)
-def get_department_api(department_id: UUID, db: Session = Depends(get_db)):
-    department = get_department(db, department_id)
+async def get_department_api(
+    department_id: UUID, db: AsyncSession = Depends(get_async_db)
+):
+    department = await get_department(db, department_id)
     if not department:
         raise HTTPException(404, "Department not found")
     return department
 
 
 @router.put("/{department_id}", response_model=DepartmentRead)
-def update_department_api(
+async def update_department_api(
     department_id: UUID,
     payload: DepartmentUpdate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
     allowed_roles = ["superadmin", "organisation_admin"]
@@ -77,7 +101,7 @@ def update_department_api(
             403, "Only superadmin or organisation admin can update departments"
         )
 
-    department = get_department(db, department_id)
+    department = await get_department(db, department_id)
     if not department:
         raise HTTPException(404, "Department not found")
 
@@ -91,20 +115,18 @@ def update_department_api(
 
     # Manager validation (if provided)
     if payload.manager_id:
-        manager = db.query(User).filter(User.id == payload.manager_id).first()
-        if not manager:
-            raise HTTPException(404, "Manager user not found")
-        if manager.organisation_id != department.organisation_id:
-            raise HTTPException(403, "Manager must belong to the same organisation")
+        await check_manager(db, payload.manager_id, department.organisation_id)
 
-    return update_department(db, department_id, payload.name, payload.manager_id)
+    return await update_department(
+        db, department_id, payload.name, payload.manager_id
+    )
 
 
 @router.delete("/{department_id}")
-def delete_department_api(
+async def delete_department_api(
     department_id: UUID,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
     allowed_roles = ["superadmin", "organisation_admin"]
@@ -114,7 +136,7 @@ def delete_department_api(
             403, "Only superadmin or organisation admin can delete departments"
         )
 
-    department = get_department(db, department_id)
+    department = await get_department(db, department_id)
     if not department:
         raise HTTPException(404, "Department not found")
 
@@ -125,16 +147,16 @@ def delete_department_api(
                 403, "You cannot delete a department of another organisation"
             )
 
-    return delete_department(db, department_id)
+    return await delete_department(db, department_id)
 
 
 
 @router.put("/{department_id}/assign-manager/{user_id}", response_model=DepartmentRead)
-def assign_manager(
+async def assign_manager_api(
     department_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
     allowed_roles = ["superadmin", "organisation_admin"]
@@ -143,7 +165,7 @@ def assign_manager(
             403, "Only superadmin or organisation admin can assign managers"
         )
 
-    department = get_department(db, department_id)
+    department = await get_department(db, department_id)
     if not department:
         raise HTTPException(404, "Department not found")
 
@@ -153,30 +175,15 @@ def assign_manager(
                 403, "You cannot modify another organisation's department"
             )
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(404, "User not found")
-
-    if user.organisation_id != department.organisation_id:
-        raise HTTPException(403, "Manager must belong to the same organisation")
-
-
-    user.role = "department_manager"
-    user.department_id = department_id
-
-    department.manager_id = user_id
-
-    db.commit()
-    db.refresh(department)
-    return department
+    return await assign_manager(db, department, user_id)
 
 
 
 @router.put("/{department_id}/remove-manager", response_model=DepartmentRead)
-def remove_manager(
+async def remove_manager_api(
     department_id: UUID,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
     allowed_roles = ["superadmin", "organisation_admin"]
@@ -185,7 +192,7 @@ def remove_manager(
             403, "Only superadmin or organisation admin can remove managers"
         )
 
-    department = get_department(db, department_id)
+    department = await get_department(db, department_id)
     if not department:
         raise HTTPException(404, "Department not found")
 
@@ -196,13 +203,4 @@ def remove_manager(
                 403, "You cannot modify another organisation's department"
             )
 
-    if department.manager_id:
-        manager = db.query(User).filter(User.id == department.manager_id).first()
-        if manager:
-            manager.role = "employee"
-
-    department.manager_id = None
-
-    db.commit()
-    db.refresh(department)
-    return department
+    return await remove_manager(db, department)
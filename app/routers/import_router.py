@@ -1,23 +1,91 @@
+import os
+from uuid import UUID
+
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from app.database.db import get_db
-from app.services.import_service import import_users_from_excel
+from app.services.import_service import import_users_from_excel, IMPORT_MODES
+from app.services.import_job_service import (
+    submit_import_job,
+    get_import_job,
+    error_report_path,
+)
 from app.core.security import get_current_user
 from app.schemas.user_schema import ExcelImportResult
+from app.schemas.import_schema import ImportJobRead
+from app.utils.excel_importer import is_supported_file
 
 router = APIRouter(prefix="/api/v1/import", tags=["Excel Import"])
 
 
+def ensure_can_import(current_user, file: UploadFile, mode: str):
+    if current_user.role not in ["superadmin", "organisation_admin"]:
+        raise HTTPException(403, "You are not allowed to import users")
+
+    if not is_supported_file(file.filename):
+        raise HTTPException(400, "Only .xlsx, .csv or .csv.gz files are allowed")
+
+    if mode not in IMPORT_MODES:
+        raise HTTPException(400, f"mode must be one of: {', '.join(IMPORT_MODES)}")
+
+
+# Plain `def`: the import is blocking work and must run on the threadpool,
+# not on the event loop. Large files should go through /users/jobs.
 @router.post("/users", response_model=ExcelImportResult)
-async def import_users(
+def import_users(
     file: UploadFile = File(...),
+    dry_run: bool = False,
+    mode: str = "insert",
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    if current_user.role not in ["superadmin", "organisation_admin"]:
-        raise HTTPException(403, "You are not allowed to import users")
+    """
+    With dry_run=true the file is only validated: the response lists the
+    same row errors and success_count is the number of rows that would
+    be imported, but nothing is written.
+
+    mode=upsert updates users whose email already exists (re-hashing the
+    password only if it changed) instead of rejecting them.
+    """
+    ensure_can_import(current_user, file, mode)
+
+    return import_users_from_excel(db, file, current_user, dry_run, mode)
+
+
+@router.post("/users/jobs", response_model=ImportJobRead, status_code=202)
+def submit_import_users_job(
+    file: UploadFile = File(...),
+    mode: str = "insert",
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    ensure_can_import(current_user, file, mode)
+
+    return submit_import_job(db, file, current_user, mode)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobRead)
+def get_import_job_status(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return get_import_job(db, job_id, current_user)
+
+
+@router.get("/jobs/{job_id}/errors")
+def download_import_job_errors(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    job = get_import_job(db, job_id, current_user)
 
-    if not file.filename.endswith(".xlsx"):
-        raise HTTPException(400, "Only .xlsx file is allowed")
+    path = error_report_path(job.id)
+    if not os.path.exists(path):
+        raise HTTPException(404, "Error report not available yet")
 
-    return import_users_from_excel(db, file, current_user)
+    return FileResponse(
+        path, media_type="text/csv", filename=f"import_{job.id}_errors.csv"
+    )
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.schemas.organisation_schema import (
@@ -7,7 +8,7 @@ from app.schemas.organisation_schema import (
     OrganisationRead,
     OrganisationUpdate,
 )
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.services.organisation_service import (
     create_organisation,
     list_organisations,
@@ -15,51 +16,67 @@ from app.services.organisation_service import (
     update_organisation,
     delete_organisation,
 )
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user_async, require_role_async
 
 router = APIRouter(prefix="/api/v1/organisations", tags=["Organisations"])
 
 
 @router.post("/", response_model=OrganisationRead)
-def create_organisation_api(
+async def create_organisation_api(
     payload: OrganisationCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_role(["superadmin"])),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_role_async(["superadmin"])),
 ):
-    return create_organisation(db, payload)
+    return await create_organisation(db, payload)
 
 
 @router.get("/", response_model=list[OrganisationRead])
-def list_organisations_api(
-    db: Session = Depends(get_db), current_user=Depends(get_current_user)
+async def list_organisations_api(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    name: Optional[str] = Query(None, description="Name prefix"),
+    organisation_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
-
-    # Superadmin sees all organisations
-    if current_user.role.lower() == "superadmin":
-        return list_organisations(db)
+    """
+    Ordered by (name, id). The X-Next-Cursor response header holds the
+    cursor for the next page and is absent on the last one.
+    """
 
     # Organisation Admin sees only their own organisation
     if current_user.role.lower() == "organisation_admin":
-        org = get_organisation(db, current_user.organisation_id)
-        if not org:
+        if organisation_id and organisation_id != current_user.organisation_id:
+            raise HTTPException(403, "You are not allowed to access another organisation")
+        if not current_user.organisation_id:
             raise HTTPException(404, "Your organisation not found")
-        return [org]
+        organisation_id = current_user.organisation_id
 
-    # Normal user cannot list all organisations
-    raise HTTPException(
-        status_code=403,
-        detail="Access denied. Only superadmin or organisation admin can view organisations.",
+    # Superadmin sees all organisations; normal users cannot list them
+    elif current_user.role.lower() != "superadmin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Only superadmin or organisation admin can view organisations.",
+        )
+
+    organisations, next_cursor = await list_organisations(
+        db, limit, cursor, name, organisation_id
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return organisations
 
 
 @router.get("/{organisation_id}", response_model=OrganisationRead)
-def get_organisation_api(
+async def get_organisation_api(
     organisation_id: UUID,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
 
-    org = get_organisation(db, organisation_id)
+    org = await get_organisation(db, organisation_id)
     if not org:
         raise HTTPException(404, "Organisation not found")
 
@@ -78,28 +95,28 @@ def get_organisation_api(
 
 
 @router.put("/{organisation_id}", response_model=OrganisationRead)
-def update_organisation_api(
+async def update_organisation_api(
     organisation_id: UUID,
     payload: OrganisationUpdate,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_role(["superadmin"])),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_role_async(["superadmin"])),
 ):
-    org = get_organisation(db, organisation_id)
+    org = await get_organisation(db, organisation_id)
     if not org:
         raise HTTPException(404, "Organisation not found")
 
-    return update_organisation(db, organisation_id, payload)
+    return await update_organisation(db, organisation_id, payload)
 
 
 @router.delete("/{organisation_id}")
-def delete_organisation_api(
+async def delete_organisation_api(
     organisation_id: UUID,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_role(["superadmin"])),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_role_async(["superadmin"])),
 ):
 
-    org = get_organisation(db, organisation_id)
+    org = await get_organisation(db, organisation_id)
     if not org:
         raise HTTPException(404, "Organisation not found")
 
-    return delete_organisation(db, organisation_id)
+    return await delete_organisation(db, organisation_id)
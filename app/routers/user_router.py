@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, literal_column
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from app.database.db import get_db
@@ -8,11 +11,24 @@ from app.models.department import Department
 from app.models.organisation import Organisation
 from app.schemas.user_schema import UserCreate, UserRead, UserUpdate
 from app.core.security import get_current_user
-from app.utils.hash import hash_password
+from app.core.principal_cache import TOKEN_CLAIM_FIELDS, principal_cache
+from app.utils.hash import hash_password, hashing_executor
+from app.services.headcount_service import placement, update_headcounts
 from app.services.log_service import create_log
+from app.utils.pagination import keyset_paginate, estimated_count, TIMESTAMP_ID
 
 router = APIRouter(prefix="/api/v1/users", tags=["Users"])
 
+# What /search matches q against; the trigram index in migration
+# 3f6a8d2b9c41 is built on exactly this expression
+USER_SEARCH_TEXT = func.lower(
+    User.first_name
+    + literal_column("' '")
+    + User.last_name
+    + literal_column("' '")
+    + User.email
+)
+
 
 
 def normalize_role(role: str):
@@ -94,42 +110,140 @@ def create_user(
         last_name=payload.last_name,
         age=payload.age,
         email=payload.email,
-        password=hash_password(payload.password),
+        password=hashing_executor.run(hash_password, payload.password),
         role=assigned_role,
         organisation_id=payload.organisation_id,
         department_id=payload.department_id,
     )
 
     db.add(new_user)
+    update_headcounts(db, [(None, placement(new_user))])
     db.commit()
     db.refresh(new_user)
 
-    create_log(db, current_user.id, f"Created user {new_user.email}")
+    create_log(db, current_user, f"Created user {new_user.email}")
 
     return new_user
 
 
+def scoped_users(db: Session, current_user):
+    """Users visible to current_user, or None for roles that may only
+    see themselves."""
+    role = normalize_role(current_user.role)
+    q = db.query(User)
+
+    if role == "superadmin":
+        return q  # superadmin sees everything
+    if role == "organisation_admin":
+        return q.filter(User.organisation_id == current_user.organisation_id)
+    if role == "department_manager":
+        return q.filter(User.department_id == current_user.department_id)
+    return None
+
+
+def keyset_page(q, cursor: Optional[str], limit: int, response: Response):
+    """One page of q in (created_at, id) order; sets X-Next-Cursor when
+    there are more rows."""
+    users, next_cursor = keyset_paginate(
+        q, [User.created_at, User.id], cursor, limit, TIMESTAMP_ID
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return users
+
+
 @router.get("", response_model=list[UserRead])
 def get_all_users(
-    page: int = 1,
-    limit: int = 10,
+    response: Response,
+    cursor: Optional[str] = None,
+    page: Optional[int] = Query(None, ge=1),
+    limit: int = Query(10, ge=1, le=200),
+    include_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Ordered by (created_at, id). The X-Next-Cursor response header holds
+    the cursor for the next page and is absent on the last one; page is
+    kept for older clients.
+
+    include_total=true adds X-Total-Count. Tenant-scoped counts are
+    exact; a superadmin's count over a large users table is the
+    planner's estimate (X-Total-Count-Exact: false).
+    """
     role = normalize_role(current_user.role)
 
-    q = db.query(User)
+    q = scoped_users(db, current_user)
+    if q is None:
+        # current_user is a cached principal, not a User row; the row
+        # may have been deleted since it was cached
+        user = db.query(User).filter(User.id == current_user.id).first()
+        return [user] if user else []
+
+    if include_total:
+        total = estimated_count(db, User.__table__) if role == "superadmin" else None
+        exact = total is None
+        if exact:
+            total = q.order_by(None).count()
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Exact"] = str(exact).lower()
+
+    if page is not None:
+        if cursor:
+            raise HTTPException(400, "Use either cursor or page, not both")
+        q = q.order_by(User.created_at, User.id).offset((page - 1) * limit)
+        return q.limit(limit).all()
+
+    return keyset_page(q, cursor, limit, response)
+
+
+@router.get("/search", response_model=list[UserRead])
+def search_users(
+    response: Response,
+    q: Optional[str] = Query(
+        None, min_length=3, description="Part of the name or email"
+    ),
+    role: Optional[str] = None,
+    organisation_id: Optional[UUID] = None,
+    department_id: Optional[UUID] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Case-insensitive substring match of q against first name, last
+    name and email, combined with the filters, within the caller's
+    usual scope. Paged like the listing (X-Next-Cursor). On PostgreSQL
+    the text match is served by the ix_users_search_trgm trigram index.
+    """
+    users = scoped_users(db, current_user)
+    if users is None:
+        raise HTTPException(403, "Not allowed")
 
-    if role == "superadmin":
-        pass  # superadmin sees everything
-    elif role == "organisation_admin":
-        q = q.filter(User.organisation_id == current_user.organisation_id)
-    elif role == "department_manager":
-        q = q.filter(User.department_id == current_user.department_id)
-    else:
-        return [current_user]
+    if q:
+        users = users.filter(USER_SEARCH_TEXT.contains(q.lower(), autoescape=True))
+    if role:
+        users = users.filter(User.role == normalize_role(role))
+    if organisation_id:
+        users = users.filter(User.organisation_id == organisation_id)
+    if department_id:
+        users = users.filter(User.department_id == department_id)
+    if min_age is not None:
+        users = users.filter(User.age >= min_age)
+    if max_age is not None:
+        users = users.filter(User.age <= max_age)
+    if created_from:
+        users = users.filter(User.created_at >= created_from)
+    if created_to:
+        users = users.filter(User.created_at < created_to)
 
-    return q.offset((page - 1) * limit).limit(limit).all()
+    return keyset_page(users, cursor, limit, response)
 
 
 
@@ -212,7 +326,7 @@ def update_user(
     data = payload.dict(exclude_unset=True)
 
     if "password" in data:
-        data["password"] = hash_password(data["password"])
+        data["password"] = hashing_executor.run(hash_password, data["password"])
 
     # Validate department update
     if data.get("department_id"):
@@ -228,14 +342,28 @@ def update_user(
         ):
             raise HTTPException(403, "Department does not belong to this organisation")
 
+    moved = "organisation_id" in data or "department_id" in data
+    if moved:
+        # lock the row so concurrent moves account from the right place
+        db.refresh(user, with_for_update=True)
+        before = placement(user)
+
     # Apply update
     for k, v in data.items():
         setattr(user, k, v)
 
+    if moved:
+        update_headcounts(db, [(before, placement(user))])
+
+    # outstanding claims-mode tokens carry the old values
+    if TOKEN_CLAIM_FIELDS.intersection(data):
+        user.token_version += 1
+
     db.commit()
     db.refresh(user)
+    principal_cache.revoke(user.id, user.token_version)
 
-    create_log(db, current_user.id, f"Updated user {user.email}")
+    create_log(db, current_user, f"Updated user {user.email}")
 
     return user
 
@@ -260,9 +388,11 @@ def delete_user(
         raise HTTPException(403, "Permission denied")
 
     db.delete(user)
+    update_headcounts(db, [(placement(user), None)])
     db.commit()
+    principal_cache.revoke(user_id, user.token_version + 1)
 
-    create_log(db, current_user.id, f"Deleted user {user.email}")
+    create_log(db, current_user, f"Deleted user {user.email}", durable=True)
 
     return {"message": "User deleted successfully"}
 
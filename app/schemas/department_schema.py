@@ -27,6 +27,7 @@ class DepartmentRead(DepartmentBase):
     id: UUID
     organisation_id: UUID
     manager_id: Optional[UUID]
+    employees_count: int = 0
 
     class Config:
         from_attributes = True
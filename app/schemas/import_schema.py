@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+
+
+class ImportJobRead(BaseModel):
+    id: UUID
+    filename: str
+    mode: str
+    status: str
+    error: Optional[str] = None
+
+    progress: float
+    rows_done: int
+    success_count: int
+    failed_count: int
+    updated_count: int
+    unchanged_count: int
+
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -66,3 +66,8 @@ class ExcelImportResult(BaseModel):
     success_count: int
     failed_count: int
     errors: List[Any]
+
+    # breakdown of success_count; updated/unchanged only in upsert mode
+    inserted_count: int = 0
+    updated_count: int = 0
+    unchanged_count: int = 0
@@ -1,5 +1,8 @@
+import hashlib
+import uuid
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from typing import Optional
@@ -8,35 +11,62 @@ from app.schemas.auth_schema import TokenData
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
 from app.core.config import settings
-from app.utils.hash import verify_password
+from app.core.principal_cache import Principal
+from app.core.rate_limit import check_login_rate
+from app.utils.hash import hashing_executor, verify_password
 from app.services.log_service import create_log
 
 
-def create_access_token(data: dict) -> str:
+def create_access_token(data: dict, expire_minutes: Optional[int] = None) -> str:
     now = datetime.utcnow()
-    expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = now + timedelta(
+        minutes=expire_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
 
     payload = {**data, "exp": expire, "iat": now}
     token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return token
 
 
+def create_user_access_token(user: User) -> str:
+    """Access token for user: just the subject, or in claims mode the
+    signed role, tenant scope and token_version with a short expiry."""
+    if settings.ACCESS_TOKEN_CLAIMS_MODE:
+        return create_access_token(
+            Principal.from_user(user).to_claims(),
+            settings.CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES,
+        )
+    return create_access_token({"sub": str(user.id)})
+
+
+def token_digest(token: str) -> bytes:
+    """Refresh tokens are stored and looked up by their SHA-256."""
+    return hashlib.sha256(token.encode()).digest()
+
+
 def create_refresh_token(db: Session, user_id: str) -> str:
+    """Issue a refresh token for user_id. The row is only added to db:
+    the caller commits it with the rest of its unit of work."""
     now = datetime.now()
     expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
-    payload = {"sub": str(user_id), "exp": expire, "iat": now}
+    # jti keeps two tokens issued in the same second apart
+    payload = {
+        "sub": str(user_id),
+        "exp": expire,
+        "iat": now,
+        "jti": uuid.uuid4().hex,
+    }
     token_str = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
     db_token = RefreshToken(
         user_id=user_id,
-        token=token_str,
+        token_hash=token_digest(token_str),
         expires_at=expire,
         revoked=False,
     )
     db.add(db_token)
-    db.commit()
 
     return token_str
 
@@ -58,41 +88,50 @@ def decode_token(token: str) -> dict:
 def authenticate_user(db: Session, email: str, password: str):
     user = db.query(User).filter(User.email == email.lower().strip()).first()
 
-    if not user or not verify_password(password, user.password):
+    if not user or not hashing_executor.run(verify_password, password, user.password):
         create_log(db, None, f"Login failed: {email}")
         return None
 
-    create_log(db, user.id, "Login successful")
+    # committed by login, together with the refresh token
+    create_log(db, user, "Login successful", commit=False)
     return user
 
 
-def login(db: Session, email: str, password: str):
+def login(db: Session, email: str, password: str, client_ip: Optional[str] = None):
+    # before any lookup or bcrypt, so refused attempts cost next to nothing
+    check_login_rate(email.lower().strip(), client_ip)
+
     user = authenticate_user(db, email, password)
     if not user:
         raise HTTPException(401, "Incorrect email or password")
 
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token(db, user.id)
-
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
+    # built before the commit, which would expire user and reload it
+    response = {
+        "access_token": create_user_access_token(user),
+        "refresh_token": create_refresh_token(db, user.id),
         "token_type": "bearer",
         "user_id": str(user.id),
         "role": user.role,
     }
+    db.commit()
 
+    return response
 
-def refresh_access_token(db: Session, refresh_token: str):
-    payload = decode_token(refresh_token)
-    user_id = payload.get("sub")
 
-    db_token = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token == refresh_token)
-        .first()
-    )
+def refresh_access_token(db: Session, refresh_token: str):
+    decode_token(refresh_token)
+
+    # ROTATE TOKEN: consume the old one in a single statement, so two
+    # concurrent refreshes with the same token cannot both succeed
+    db_token = db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.token_hash == token_digest(refresh_token))
+        .returning(
+            RefreshToken.user_id, RefreshToken.revoked, RefreshToken.expires_at
+        )
+    ).first()
 
+    # raising rolls the delete back with the request's session
     if not db_token:
         raise HTTPException(401, "Refresh token invalid")
 
@@ -102,30 +141,32 @@ def refresh_access_token(db: Session, refresh_token: str):
     if db_token.expires_at < datetime.utcnow():
         raise HTTPException(401, "Refresh token expired")
 
-    # ROTATE TOKEN — delete old one
-    db.delete(db_token)
-    db.commit()
+    if settings.ACCESS_TOKEN_CLAIMS_MODE:
+        # claims are re-read from the user row, picking up any role change
+        user = db.query(User).filter(User.id == db_token.user_id).first()
+        if not user:
+            raise HTTPException(401, "Refresh token invalid")
+        new_access = create_user_access_token(user)
+    else:
+        new_access = create_access_token({"sub": str(db_token.user_id)})
 
-    new_access = create_access_token({"sub": user_id})
-    new_refresh = create_refresh_token(db, user_id)
+    new_refresh = create_refresh_token(db, db_token.user_id)
+    db.commit()
 
     return {
         "access_token": new_access,
         "refresh_token": new_refresh,
         "token_type": "bearer",
-        "user_id": user_id,
+        "user_id": str(db_token.user_id),
     }
 
 
 def logout(db: Session, refresh_token: str):
-    db_token = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token == refresh_token)
-        .first()
+    db.execute(
+        delete(RefreshToken).where(
+            RefreshToken.token_hash == token_digest(refresh_token)
+        )
     )
-
-    if db_token:
-        db.delete(db_token)
-        db.commit()
+    db.commit()
 
     return {"message": "Logged out successfully"}
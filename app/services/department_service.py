@@ -1,28 +1,37 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from uuid import UUID
 from typing import Optional
 
 
+from app.core.principal_cache import principal_cache
 from app.models.department import Department
 from app.models.organisation import Organisation
 from app.models.user import User
+from app.services.headcount_service import placement, update_headcounts_async
+from app.utils.pagination import keyset_page, keyset_page_query
 
+NAME_ID = (str, UUID)
 
-def create_department(
-    db: Session, name: str, organisation_id: UUID, manager_id: Optional[UUID] = None
+
+async def create_department(
+    db: AsyncSession,
+    name: str,
+    organisation_id: UUID,
+    manager_id: Optional[UUID] = None,
 ):
 
-    org = db.query(Organisation).filter(Organisation.id == organisation_id).first()
+    org = await db.get(Organisation, organisation_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organisation not found")
 
-    existing = (
-        db.query(Department)
+    existing = await db.scalar(
+        select(Department)
         .filter(
             Department.organisation_id == organisation_id, Department.name.ilike(name)
         )
-        .first()
+        .limit(1)
     )
 
     if existing:
@@ -32,7 +41,7 @@ def create_department(
         )
 
     if manager_id:
-        manager = db.query(User).filter(User.id == manager_id).first()
+        manager = await db.get(User, manager_id)
         if not manager:
             raise HTTPException(status_code=404, detail="Manager user not found")
 
@@ -44,39 +53,58 @@ def create_department(
     dept = Department(name=name, organisation_id=organisation_id, manager_id=manager_id)
 
     db.add(dept)
-    db.commit()
-    db.refresh(dept)
+    await db.commit()
+    await db.refresh(dept)
     return dept
 
 
-def get_department(db: Session, department_id: UUID):
-    dept = db.query(Department).filter(Department.id == department_id).first()
+async def get_department(db: AsyncSession, department_id: UUID):
+    dept = await db.get(Department, department_id)
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found")
     return dept
 
 
-def list_departments(db: Session):
-    return db.query(Department).all()
+async def list_departments(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    organisation_id: Optional[UUID] = None,
+):
+    """One page of departments ordered by (name, id), optionally
+    filtered by name prefix and organisation. Returns
+    (departments, next_cursor)."""
+    q = select(Department)
+
+    if name:
+        q = q.filter(Department.name.startswith(name, autoescape=True))
+    if organisation_id:
+        q = q.filter(Department.organisation_id == organisation_id)
 
+    columns = [Department.name, Department.id]
+    q = keyset_page_query(q, columns, cursor, limit, NAME_ID)
+    rows = (await db.scalars(q)).all()
+    return keyset_page(rows, columns, limit)
 
-def update_department(
-    db: Session,
+
+async def update_department(
+    db: AsyncSession,
     department_id: UUID,
     name: Optional[str] = None,
     manager_id: Optional[UUID] = None,
 ):
-    dept = get_department(db, department_id)
+    dept = await get_department(db, department_id)
 
     if name:
-        duplicate = (
-            db.query(Department)
+        duplicate = await db.scalar(
+            select(Department)
             .filter(
                 Department.organisation_id == dept.organisation_id,
                 Department.name.ilike(name),
                 Department.id != department_id,
             )
-            .first()
+            .limit(1)
         )
 
         if duplicate:
@@ -91,7 +119,7 @@ def update_department(
         if manager_id == "":
             dept.manager_id = None
         else:
-            manager = db.query(User).filter(User.id == manager_id).first()
+            manager = await db.get(User, manager_id)
             if not manager:
                 raise HTTPException(status_code=404, detail="Manager not found")
 
@@ -103,13 +131,64 @@ def update_department(
 
             dept.manager_id = manager_id
 
-    db.commit()
-    db.refresh(dept)
+    await db.commit()
+    await db.refresh(dept)
     return dept
 
 
-def delete_department(db: Session, department_id: UUID):
-    dept = get_department(db, department_id)
-    db.delete(dept)
-    db.commit()
+async def delete_department(db: AsyncSession, department_id: UUID):
+    dept = await get_department(db, department_id)
+    await db.delete(dept)
+    await db.commit()
     return {"detail": "Department deleted successfully"}
+
+
+async def check_manager(db: AsyncSession, manager_id: UUID, organisation_id: UUID):
+    manager = await db.get(User, manager_id)
+
+    if not manager:
+        raise HTTPException(404, "Manager user not found")
+
+    if manager.organisation_id != organisation_id:
+        raise HTTPException(403, "Manager must belong to the same organisation")
+
+
+async def assign_manager(db: AsyncSession, department: Department, user_id: UUID):
+    # locked: the headcount move below accounts from its current department
+    user = await db.get(User, user_id, with_for_update=True, populate_existing=True)
+    if not user:
+        raise HTTPException(404, "User not found")
+
+    if user.organisation_id != department.organisation_id:
+        raise HTTPException(403, "Manager must belong to the same organisation")
+
+    before = placement(user)
+    user.role = "department_manager"
+    user.department_id = department.id
+    user.token_version += 1
+    await update_headcounts_async(db, [(before, placement(user))])
+    department.manager_id = user_id
+
+    await db.commit()
+    principal_cache.revoke(user_id, user.token_version)
+
+    await db.refresh(department)
+    return department
+
+
+async def remove_manager(db: AsyncSession, department: Department):
+    manager = None
+    if department.manager_id:
+        manager = await db.get(User, department.manager_id)
+        if manager:
+            manager.role = "employee"
+            manager.token_version += 1
+
+    department.manager_id = None
+
+    await db.commit()
+    if manager:
+        principal_cache.revoke(manager.id, manager.token_version)
+
+    await db.refresh(department)
+    return department
@@ -0,0 +1,118 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Update, bindparam, func, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.department import Department
+from app.models.organisation import Organisation
+from app.models.user import User
+
+# Where a user counts: (organisation_id, department_id), None when the
+# user does not exist (before a create, after a delete)
+Placement = Optional[Tuple[Optional[UUID], Optional[UUID]]]
+
+
+def placement(user) -> Placement:
+    return (user.organisation_id, user.department_id)
+
+
+def headcount_updates(moves: Iterable[Tuple[Placement, Placement]]) -> List[Update]:
+    """The UPDATEs that apply (before, after) placement changes to the
+    stored headcounts.
+
+    Each count is bumped with a single `employees_count = employees_count
+    + delta` UPDATE, so concurrent writers never lose an increment; rows
+    are updated in id order to keep lock order stable.
+    """
+    organisations, departments = Counter(), Counter()
+
+    for before, after in moves:
+        for place, delta in ((before, -1), (after, 1)):
+            if place is None:
+                continue
+            organisation_id, department_id = place
+            if organisation_id:
+                organisations[organisation_id] += delta
+            if department_id:
+                departments[department_id] += delta
+
+    statements = []
+    for model, deltas in ((Organisation, organisations), (Department, departments)):
+        for row_id, delta in sorted(deltas.items()):
+            if delta:
+                statements.append(
+                    update(model)
+                    .where(model.id == row_id)
+                    .values(employees_count=model.employees_count + delta)
+                    .execution_options(synchronize_session=False)
+                )
+    return statements
+
+
+def update_headcounts(db: Session, moves: Iterable[Tuple[Placement, Placement]]):
+    """Apply placement changes inside the caller's transaction, next to
+    the user write they account for."""
+    for statement in headcount_updates(moves):
+        db.execute(statement)
+
+
+async def update_headcounts_async(
+    db: AsyncSession, moves: Iterable[Tuple[Placement, Placement]]
+):
+    """update_headcounts on an AsyncSession."""
+    for statement in headcount_updates(moves):
+        await db.execute(statement)
+
+
+def count_users(db: Session) -> Tuple[Dict[UUID, int], Dict[UUID, int]]:
+    """Actual headcounts per organisation and per department, from one
+    GROUP BY over users."""
+    organisations, departments = Counter(), Counter()
+
+    rows = db.query(User.organisation_id, User.department_id, func.count()).group_by(
+        User.organisation_id, User.department_id
+    )
+    for organisation_id, department_id, count in rows:
+        if organisation_id:
+            organisations[organisation_id] += count
+        if department_id:
+            departments[department_id] += count
+
+    return organisations, departments
+
+
+def recompute_headcounts(db: Session, dry_run: bool = False) -> Dict[str, int]:
+    """Reset every stored headcount to the actual count and return how
+    many rows were wrong, per table. Nothing is committed here.
+
+    On PostgreSQL users is locked in SHARE mode first: every headcount
+    change goes with a write to users, so none can slip in between the
+    count and the fix.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE users IN SHARE MODE"))
+
+    actual = dict(zip(("organisations", "departments"), count_users(db)))
+    fixed = {}
+
+    for model in (Organisation, Department):
+        counts = actual[model.__tablename__]
+        wrong = [
+            {"row_id": row_id, "count": counts.get(row_id, 0)}
+            for row_id, stored in db.query(model.id, model.employees_count)
+            if stored != counts.get(row_id, 0)
+        ]
+        fixed[model.__tablename__] = len(wrong)
+
+        if wrong and not dry_run:
+            db.connection().execute(
+                update(model.__table__)
+                .where(model.__table__.c.id == bindparam("row_id"))
+                .values(employees_count=bindparam("count")),
+                wrong,
+            )
+
+    return fixed
@@ -0,0 +1,237 @@
+import csv
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.db import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.import_service import import_users
+
+logger = logging.getLogger(__name__)
+
+# Imports run here, never on the event loop or the request threadpool
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMPORT_JOB_WORKERS, thread_name_prefix="import-job"
+)
+
+
+def job_dir() -> str:
+    path = settings.IMPORT_JOB_DIR or os.path.join(
+        tempfile.gettempdir(), "user_import_jobs"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def upload_path(job_id: UUID) -> str:
+    return os.path.join(job_dir(), f"{job_id}.upload")
+
+
+def error_report_path(job_id: UUID) -> str:
+    return os.path.join(job_dir(), f"{job_id}_errors.csv")
+
+
+def save_upload(file) -> tuple:
+    """Copy the upload to the job directory, hashing it on the way.
+    Returns (temporary path, sha256 hex digest)."""
+    digest = hashlib.sha256()
+    path = os.path.join(job_dir(), f"{uuid4()}.part")
+
+    with open(path, "wb") as out:
+        for block in iter(lambda: file.file.read(1024 * 1024), b""):
+            digest.update(block)
+            out.write(block)
+
+    return path, digest.hexdigest()
+
+
+def find_resumable_job(db: Session, file_hash: str, mode: str, current_user):
+    """An unfinished job for the same file by the same user. A job still
+    heartbeating (updated after every chunk) is not resumable.
+
+    The job is locked until the caller commits, so two uploads cannot
+    both resume it; two uploads both creating a job are stopped by
+    ix_import_jobs_active_file instead."""
+    job = (
+        db.query(ImportJob)
+        .filter(
+            ImportJob.file_hash == file_hash,
+            ImportJob.mode == mode,
+            ImportJob.created_by == current_user.id,
+            ImportJob.status != "completed",
+        )
+        .order_by(ImportJob.created_at.desc())
+        .with_for_update()
+        .first()
+    )
+    if not job:
+        return None
+
+    stale_before = datetime.utcnow() - timedelta(
+        seconds=settings.IMPORT_JOB_STALE_SECONDS
+    )
+    if job.status in ("queued", "running") and job.updated_at > stale_before:
+        raise HTTPException(
+            status_code=409, detail="This file is already being imported"
+        )
+
+    return job
+
+
+def submit_import_job(
+    db: Session, file, current_user, mode: str = "insert"
+) -> ImportJob:
+    """Queue an import. Uploading a file that has an unfinished job
+    resumes that job after its last committed chunk."""
+    saved_path, file_hash = save_upload(file)
+
+    try:
+        job = find_resumable_job(db, file_hash, mode, current_user)
+    except HTTPException:
+        os.remove(saved_path)
+        raise
+
+    if job:
+        job.filename = file.filename
+        job.status = "queued"
+        job.error = None
+        job.finished_at = None
+    else:
+        job = ImportJob(
+            filename=file.filename,
+            created_by=current_user.id,
+            mode=mode,
+            file_hash=file_hash,
+            chunk_size=settings.IMPORT_BATCH_SIZE,
+        )
+        db.add(job)
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # a concurrent upload of the same file created its job first
+        db.rollback()
+        os.remove(saved_path)
+        raise HTTPException(
+            status_code=409, detail="This file is already being imported"
+        )
+    db.refresh(job)
+
+    os.replace(saved_path, upload_path(job.id))
+
+    # current_user is a detached Principal, safe to hand to the worker
+    executor.submit(run_import_job, job.id, current_user)
+
+    return job
+
+
+def run_import_job(job_id: UUID, actor):
+    db = SessionLocal()
+    path = upload_path(job_id)
+    job = db.get(ImportJob, job_id)
+
+    try:
+        job.status = "running"
+        db.commit()
+
+        size = os.path.getsize(path) or 1
+        resuming = job.chunks_done > 0
+
+        if resuming:
+            trim_error_report(job_id, job.last_row)
+
+        with open(path, "rb") as fileobj, open(
+            error_report_path(job_id), "a" if resuming else "w", newline=""
+        ) as report:
+            writer = csv.writer(report)
+            if not resuming:
+                writer.writerow(["row", "error"])
+
+            for result in import_users(
+                db,
+                fileobj,
+                job.filename,
+                actor,
+                chunk_size=job.chunk_size,
+                skip_chunks=job.chunks_done,
+                mode=job.mode,
+            ):
+                writer.writerows(
+                    (error["row"], error["error"]) for error in result.errors
+                )
+                report.flush()
+
+                # checkpoint commits together with the chunk's rows
+                job.rows_done += result.rows
+                job.success_count += result.written
+                job.updated_count += result.updated
+                job.unchanged_count += result.unchanged
+                job.failed_count += len(result.errors)
+                job.chunks_done += 1
+                job.last_row = result.last_row
+                job.progress = min(fileobj.tell() / size, 1.0)
+                db.commit()
+
+        job.status = "completed"
+        job.progress = 1.0
+
+    except HTTPException as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e.detail)
+
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+
+    finally:
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        db.close()
+
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def trim_error_report(job_id: UUID, last_row: int):
+    """Drop report lines written for a chunk that never committed, so a
+    resumed job does not report them twice."""
+    path = error_report_path(job_id)
+
+    if not os.path.exists(path):
+        with open(path, "w", newline="") as report:
+            csv.writer(report).writerow(["row", "error"])
+        return
+
+    kept_path = f"{path}.tmp"
+    with open(path, newline="") as source, open(kept_path, "w", newline="") as kept:
+        reader = csv.reader(source)
+        writer = csv.writer(kept)
+        writer.writerow(next(reader, ["row", "error"]))
+        for line in reader:
+            if int(line[0]) <= last_row:
+                writer.writerow(line)
+
+    os.replace(kept_path, path)
+
+
+def get_import_job(db: Session, job_id: UUID, current_user) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    if current_user.role != "superadmin" and job.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    return job
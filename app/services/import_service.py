@@ -1,11 +1,20 @@
-import pandas as pd
-from typing import List, Any
+import math
+from collections import namedtuple
+from itertools import islice
+from typing import List, Any, Optional
+from uuid import UUID
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.principal_cache import TOKEN_CLAIM_FIELDS, principal_cache
+from app.database.bulk_writer import bulk_write_users
 from app.models.user import User
 from app.models.organisation import Organisation
 from app.models.department import Department
-from app.utils.hash import hash_password
+from app.services.headcount_service import placement, update_headcounts
+from app.utils.excel_importer import read_rows, iter_chunks
+from app.utils.hash import hash_passwords, verify_passwords
+from app.utils.import_validator import preflight
 
 REQUIRED_COLUMNS = [
     "first_name",
@@ -18,76 +27,440 @@ REQUIRED_COLUMNS = [
     "role",
 ]
 
+IMPORT_MODES = ("insert", "upsert")
 
-def import_users_from_excel(db: Session, file, current_user):
-    df = pd.read_excel(file.file)
+# Fields an upsert compares (besides the password) and writes
+UPSERT_COMPARED_FIELDS = [
+    "first_name",
+    "last_name",
+    "age",
+    "role",
+    "organisation_id",
+    "department_id",
+]
+UPSERT_WRITTEN_FIELDS = UPSERT_COMPARED_FIELDS + ["password"]
 
-    df = df.where(pd.notnull(df), None)
-    df = df.replace({"null": None, "NULL": None})
+# rows: rows read in the chunk, last_row: its last spreadsheet row number,
+# written: rows that went through (updated and unchanged included)
+ChunkResult = namedtuple(
+    "ChunkResult", ["rows", "last_row", "written", "updated", "unchanged", "errors"]
+)
 
-    for col in REQUIRED_COLUMNS:
-        if col not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Missing column: {col}")
+# Keeps IN (...) lists below the bind parameter limit of every backend
+LOOKUP_BATCH_SIZE = 900
 
-    success_count = 0
-    errors: List[Any] = []
 
-    for index, row in df.iterrows():
-        try:
-            org = None
+def clean_value(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, str) and value.strip() in ("", "null", "NULL"):
+        return None
+    return value
+
+
+def parse_uuid(value) -> Optional[UUID]:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value).strip())
+    except ValueError:
+        return None
+
+
+def in_batches(values, size: int = LOOKUP_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class ImportLookups:
+    """Batched lookups for the importer.
+
+    Organisations and departments are few, so everything resolved so far
+    is kept for the rest of the file; emails are resolved per chunk.
+    """
+
+    def __init__(self):
+        self.organisations = {}  # id -> exists
+        self.departments = {}  # id -> organisation_id, None if missing
+
+    def load(self, db: Session, rows, full: bool = False):
+        """Resolve the chunk's organisations and departments and return
+        its users that already exist, keyed by email. With full=False
+        only emails are fetched (values are None); upserts need full
+        rows to diff against."""
+        org_ids, dept_ids, emails = set(), set(), set()
+
+        for _, row in rows:
             if row["organisation_id"]:
-                org = (
-                    db.query(Organisation)
-                    .filter(Organisation.id == row["organisation_id"])
-                    .first()
-                )
-                if not org:
-                    raise Exception("Invalid organisation_id")
-
-                if current_user.role == "organisation_admin":
-                    if current_user.organisation_id != org.id:
-                        raise Exception("Cannot import for another organisation")
-                    
-            dept = None
+                org_id = parse_uuid(row["organisation_id"])
+                if org_id and org_id not in self.organisations:
+                    org_ids.add(org_id)
             if row["department_id"]:
-                dept = (
-                    db.query(Department)
-                    .filter(Department.id == row["department_id"])
-                    .first()
+                dept_id = parse_uuid(row["department_id"])
+                if dept_id and dept_id not in self.departments:
+                    dept_ids.add(dept_id)
+            if row["email"]:
+                emails.add(row["email"])
+
+        for batch in in_batches(org_ids):
+            found = {
+                org_id
+                for (org_id,) in db.query(Organisation.id).filter(
+                    Organisation.id.in_(batch)
                 )
-                if not dept:
-                    raise Exception("Invalid department_id")
-
-                if org and dept.organisation_id != org.id:
-                    raise Exception("Department does not belong to organisation")
-
-            existing = db.query(User).filter(User.email == row["email"]).first()
-            if existing:
-                raise Exception("Email already exists")
-
-            user = User(
-                first_name=row["first_name"],
-                last_name=row["last_name"],
-                age=int(row["age"]) if row["age"] is not None else None,
-                email=row["email"],
-                password=hash_password(row["password"]),
-                role=row["role"],
-                organisation_id=row["organisation_id"],
-                department_id=row["department_id"],
+            }
+            for org_id in batch:
+                self.organisations[org_id] = org_id in found
+
+        for batch in in_batches(dept_ids):
+            found = dict(
+                db.query(Department.id, Department.organisation_id)
+                .filter(Department.id.in_(batch))
+                .all()
+            )
+            for dept_id in batch:
+                self.departments[dept_id] = found.get(dept_id)
+
+        columns = [User.email]
+        if full:
+            columns += [User.id, User.password, User.token_version]
+            columns += [getattr(User, field) for field in UPSERT_COMPARED_FIELDS]
+
+        existing = {}
+        for batch in in_batches(emails):
+            for user in db.query(*columns).filter(User.email.in_(batch)):
+                existing[user.email] = user if full else None
+
+        return existing
+
+
+def validate_row(
+    row, current_user, lookups: ImportLookups, existing, mode: str = "insert"
+):
+    """Same checks, in the same order, as the old per-row queries.
+    Returns the column values for the user (password still in plain
+    text) or raises."""
+    org_id = None
+    if row["organisation_id"]:
+        org_id = parse_uuid(row["organisation_id"])
+        if not lookups.organisations.get(org_id):
+            raise Exception("Invalid organisation_id")
+
+        if current_user.role == "organisation_admin":
+            if current_user.organisation_id != org_id:
+                raise Exception("Cannot import for another organisation")
+
+    dept_id = None
+    if row["department_id"]:
+        dept_id = parse_uuid(row["department_id"])
+        if not lookups.departments.get(dept_id):
+            raise Exception("Invalid department_id")
+
+        if org_id and lookups.departments[dept_id] != org_id:
+            raise Exception("Department does not belong to organisation")
+
+    if row["email"] in existing:
+        if mode != "upsert":
+            raise Exception("Email already exists")
+
+        current = existing[row["email"]]
+        if (
+            current_user.role == "organisation_admin"
+            and current.organisation_id != current_user.organisation_id
+        ):
+            raise Exception("Cannot import for another organisation")
+
+    return {
+        "first_name": row["first_name"],
+        "last_name": row["last_name"],
+        "age": int(row["age"]) if row["age"] is not None else None,
+        "email": row["email"],
+        "password": row["password"],
+        "role": row["role"],
+        "organisation_id": org_id,
+        "department_id": dept_id,
+    }
+
+
+def row_placement(values):
+    return (values["organisation_id"], values["department_id"])
+
+
+def hash_batch(batch, errors: List[Any]):
+    """Replace plain passwords with bcrypt hashes, fanned out over the
+    hashing pool. Rows whose password cannot be hashed are reported."""
+    hashed_batch = []
+    hashes = hash_passwords(values["password"] for _, values in batch)
+
+    for (row_number, values), hashed in zip(batch, hashes):
+        if isinstance(hashed, Exception):
+            errors.append({"row": row_number, "error": str(hashed)})
+            continue
+        hashed_batch.append((row_number, {**values, "password": hashed}))
+
+    return hashed_batch
+
+
+def write_batch(
+    db: Session, batch, errors: List[Any], update_fields: Optional[List[str]] = None
+) -> int:
+    """Bulk-write a batch of validated rows inside a savepoint. If the
+    batch is rejected, retry row by row so one bad row only fails itself.
+    With update_fields, existing emails are updated (upsert). Nothing is
+    committed here."""
+    try:
+        with db.begin_nested():
+            skipped = bulk_write_users(
+                db, [values for _, values in batch], update_fields
             )
+    except Exception:
+        pass
+    else:
+        # skipped emails were taken since validation (a concurrent import)
+        for row_number, values in batch:
+            if values["email"] in skipped:
+                errors.append({"row": row_number, "error": "Email already exists"})
+        return len(batch) - len(skipped)
+
+    written = 0
+    for row_number, values in batch:
+        try:
+            with db.begin_nested():
+                skipped = bulk_write_users(db, [values], update_fields)
+        except Exception as e:
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+
+        if skipped:
+            errors.append({"row": row_number, "error": "Email already exists"})
+        else:
+            written += 1
+
+    return written
+
+
+def split_upserts(batch, existing, check_passwords: bool = True):
+    """Split validated rows into new users, changed users and an
+    unchanged count. A changed password is detected with a bcrypt verify
+    against the stored hash; when it still matches, the stored hash is
+    kept so the row is not re-hashed. Returns (new, changed, unchanged)
+    where changed rows carry needs_hash."""
+    new, known = [], []
+    for row_number, values in batch:
+        if values["email"] in existing:
+            known.append((row_number, values))
+        else:
+            new.append((row_number, values))
+
+    if check_passwords:
+        same_password = verify_passwords(
+            (values["password"], existing[values["email"]].password)
+            for _, values in known
+        )
+    else:
+        same_password = [True] * len(known)
+
+    changed, unchanged = [], 0
 
-            db.add(user)
-            db.commit()
-            success_count += 1
+    for (row_number, values), same in zip(known, same_password):
+        current = existing[values["email"]]
+        values = dict(values)
 
+        if same is True:
+            values["password"] = current.password
+
+        fields_changed = any(
+            values[field] != getattr(current, field)
+            for field in UPSERT_COMPARED_FIELDS
+        )
+
+        if same is True and not fields_changed:
+            unchanged += 1
+        else:
+            changed.append((row_number, values, same is not True))
+
+    return new, changed, unchanged
+
+
+def import_chunk(
+    db: Session,
+    chunk,
+    current_user,
+    lookups: ImportLookups,
+    dry_run: bool = False,
+    seen_emails=None,
+    mode: str = "insert",
+):
+    """Validate, hash and write one chunk. Returns (written, updated,
+    unchanged, errors); written counts every row that went through,
+    including updated and unchanged ones.
+
+    Rows go through the vectorized pre-flight checks first; only the
+    survivors cost lookups, hashing and writes. A dry run stops after
+    validation and reports how many rows would have been written
+    (without checking whether upserted passwords changed).
+    """
+    chunk, errors = preflight(chunk, seen_emails)
+    batch = []
+
+    existing = lookups.load(db, chunk, full=mode == "upsert") if chunk else {}
+
+    for row_number, row in chunk:
+        try:
+            values = validate_row(row, current_user, lookups, existing, mode)
         except Exception as e:
-            errors.append(
-                {"row": int(index) + 2, "error": str(e)}
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+
+        batch.append((row_number, values))
+
+    written = updated = unchanged = 0
+
+    if mode == "upsert" and batch:
+        new, changed, unchanged = split_upserts(
+            batch, existing, check_passwords=not dry_run
+        )
+        if dry_run:
+            updated = len(changed)
+            written = len(new) + updated + unchanged
+        else:
+            to_hash = list(new)
+            keep_hash = []
+            for row_number, values, needs_hash in changed:
+                target = to_hash if needs_hash else keep_hash
+                target.append((row_number, values))
+
+            failed_before = len(errors)
+            hashed = hash_batch(to_hash, errors) + keep_hash
+            hashed.sort(key=lambda item: item[0])
+
+            written = (
+                write_batch(db, hashed, errors, UPSERT_WRITTEN_FIELDS) if hashed else 0
             )
-            db.rollback()
+
+            failed_rows = {error["row"] for error in errors[failed_before:]}
+            updated = sum(1 for n, _, _ in changed if n not in failed_rows)
+            moves = [
+                (None, row_placement(values))
+                for n, values in new
+                if n not in failed_rows
+            ]
+            moves += [
+                (placement(existing[values["email"]]), row_placement(values))
+                for n, values, _ in changed
+                if n not in failed_rows
+            ]
+            update_headcounts(db, moves)
+            # write_batch bumped token_version where a claim changed;
+            # reject this process's tokens with the old claims too
+            for n, values, needs_hash in changed:
+                if n in failed_rows:
+                    continue
+                current = existing[values["email"]]
+                if needs_hash or any(
+                    values[field] != getattr(current, field)
+                    for field in TOKEN_CLAIM_FIELDS.intersection(UPSERT_COMPARED_FIELDS)
+                ):
+                    principal_cache.revoke(current.id, current.token_version + 1)
+                else:
+                    principal_cache.invalidate(current.id)
+            written += unchanged
+
+    elif dry_run:
+        written = len(batch)
+    elif batch:
+        failed_before = len(errors)
+        written = write_batch(db, hash_batch(batch, errors), errors)
+
+        failed_rows = {error["row"] for error in errors[failed_before:]}
+        update_headcounts(
+            db,
+            [
+                (None, row_placement(values))
+                for n, values in batch
+                if n not in failed_rows
+            ],
+        )
+
+    errors.sort(key=lambda error: error["row"])
+    return written, updated, unchanged, errors
+
+
+def import_users(
+    db: Session,
+    fileobj,
+    filename: str,
+    current_user,
+    dry_run: bool = False,
+    chunk_size: Optional[int] = None,
+    skip_chunks: int = 0,
+    mode: str = "insert",
+):
+    """Stream an .xlsx, .csv or .csv.gz file in chunks of chunk_size
+    (default IMPORT_BATCH_SIZE) rows; each chunk is validated, hashed and
+    written before the next one is read.
+
+    mode="upsert" updates users whose email already exists instead of
+    rejecting them.
+
+    Yields a ChunkResult after every chunk so callers can report progress
+    without holding the whole error list. The chunk is flushed but not
+    committed: the caller commits, so it can save its own checkpoint in
+    the same transaction. The first skip_chunks chunks (already committed
+    by an earlier run of the same file) are read past without any
+    validation or queries.
+    """
+    chunk_size = chunk_size or settings.IMPORT_BATCH_SIZE
+    columns, rows = read_rows(fileobj, filename)
+
+    for col in REQUIRED_COLUMNS:
+        if col not in columns:
+            raise HTTPException(status_code=400, detail=f"Missing column: {col}")
+
+    lookups = ImportLookups()
+    # nothing is committed in a dry run, so repeats across chunks have
+    # to be tracked here instead of being found in the database
+    seen_emails = set() if dry_run else None
+
+    rows = islice(rows, skip_chunks * chunk_size, None)
+
+    cleaned = (
+        (row_number, {col: clean_value(row.get(col)) for col in REQUIRED_COLUMNS})
+        for row_number, row in rows
+    )
+
+    for chunk in iter_chunks(cleaned, chunk_size):
+        written, updated, unchanged, errors = import_chunk(
+            db, chunk, current_user, lookups, dry_run, seen_emails, mode
+        )
+        yield ChunkResult(
+            len(chunk), chunk[-1][0], written, updated, unchanged, errors
+        )
+
+
+def import_users_from_excel(
+    db: Session, file, current_user, dry_run: bool = False, mode: str = "insert"
+):
+    success_count = updated_count = unchanged_count = 0
+    errors: List[Any] = []
+
+    for result in import_users(
+        db, file.file, file.filename, current_user, dry_run, mode=mode
+    ):
+        db.commit()
+        success_count += result.written
+        updated_count += result.updated
+        unchanged_count += result.unchanged
+        errors.extend(result.errors)
 
     return {
         "success_count": int(success_count),
         "failed_count": int(len(errors)),
         "errors": errors,
+        "inserted_count": success_count - updated_count - unchanged_count,
+        "updated_count": updated_count,
+        "unchanged_count": unchanged_count,
     }
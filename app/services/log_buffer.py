@@ -0,0 +1,121 @@
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.log import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class LogBuffer:
+    """Write-behind queue for activity log rows.
+
+    Requests enqueue plain row dicts; a daemon thread writes them with
+    one multi-row INSERT per batch_size rows, at the latest every
+    flush_interval seconds. The queue is bounded: when it is full, add
+    waits up to put_timeout and then reports failure so the caller can
+    write the row itself.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        put_timeout: float,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, row: dict) -> bool:
+        if self._closed.is_set():
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            return False
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """Write everything queued so far, on the calling thread."""
+        with self._write_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if not batch:
+                    return
+                self._write(batch)
+
+    def close(self, timeout: float = 10):
+        """Stop the flush thread and write whatever is still queued."""
+        self._closed.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._thread:
+            return
+
+        with self._start_lock:
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="activity-log-flush", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Activity log flush failed")
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            db.execute(insert(ActivityLog.__table__), batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # one bad row (e.g. its user was deleted meanwhile) must not
+            # cost the rest of the batch
+            for row in batch:
+                try:
+                    db.execute(insert(ActivityLog.__table__), [row])
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    logger.exception("Dropping activity log entry %r", row)
+        finally:
+            db.close()
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.log import ActivityLog
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+EXPORT_COLUMNS = [
+    "id",
+    "timestamp",
+    "user_id",
+    "organisation_id",
+    "department_id",
+    "action",
+]
+
+# Rows fetched per round trip from the server-side cursor, and encoded
+# into each chunk sent to the client
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(export_value, row)))) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([export_value(v) for v in row] for row in rows)
+    return buffer.getvalue()
+
+
+def export_logs(
+    db: Session, conditions, format: str = "ndjson", compress: bool = False
+) -> Iterator[bytes]:
+    """Yield the matching logs, oldest first, encoded in chunks of
+    EXPORT_BATCH_SIZE rows. The query runs on a server-side cursor
+    (yield_per), and with compress each chunk is gzipped and flushed on
+    its own, so the client gets bytes as soon as the first rows do."""
+    stmt = (
+        select(*(getattr(ActivityLog, column) for column in EXPORT_COLUMNS))
+        .where(*conditions)
+        .order_by(ActivityLog.timestamp, ActivityLog.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        if compressor:
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    if format == "csv":
+        yield emit(encode_csv([], header=True))
+
+    for rows in db.execute(stmt).partitions():
+        if format == "csv":
+            yield emit(encode_csv(rows))
+        else:
+            yield emit(encode_ndjson(rows))
+
+    if compressor:
+        yield compressor.flush()
@@ -1,17 +1,55 @@
+import uuid
+from datetime import datetime
+
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from uuid import UUID
+from app.core.config import settings
+from app.database.db import SessionLocal
 from app.models.log import ActivityLog
-from typing import Optional
+from app.services.log_buffer import LogBuffer
 
+log_buffer = LogBuffer(
+    SessionLocal,
+    max_size=settings.LOG_BUFFER_MAX_SIZE,
+    batch_size=settings.LOG_BUFFER_BATCH_SIZE,
+    flush_interval=settings.LOG_BUFFER_FLUSH_SECONDS,
+    put_timeout=settings.LOG_BUFFER_PUT_TIMEOUT,
+)
 
-def create_log(db: Session, user_id: Optional[UUID], action: str):
-    try:
-        log = ActivityLog(user_id=user_id, action=action)
 
+def create_log(
+    db: Session, actor, action: str, durable: bool = False, commit: bool = True
+):
+    """Record an activity log entry for actor (a Principal or User, or
+    None for anonymous events), stamped with the actor's organisation
+    and department so logs can be filtered by tenant.
+
+    By default the entry goes through the write-behind buffer and is
+    persisted shortly after the request. With durable=True, or when the
+    buffer is disabled or full, it is committed here before returning;
+    with commit=False it is only added to db, for the caller to commit
+    with the rest of its unit of work.
+    """
+    row = {
+        "id": uuid.uuid4(),
+        "user_id": actor.id if actor else None,
+        "organisation_id": actor.organisation_id if actor else None,
+        "department_id": actor.department_id if actor else None,
+        "action": action,
+        "timestamp": datetime.utcnow(),
+    }
+
+    if not durable and settings.LOG_BUFFER_ENABLED and log_buffer.add(row):
+        return None
+
+    log = ActivityLog(**row)
+    if not commit:
+        db.add(log)
+        return log
+
+    try:
         db.add(log)
         db.commit()
-        db.refresh(log)
         return log
 
     except Exception as e:
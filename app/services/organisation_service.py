@@ -1,13 +1,18 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from typing import Optional
 from fastapi import HTTPException
 
 from app.models.organisation import Organisation
+from app.utils.pagination import keyset_page, keyset_page_query
 
+NAME_ID = (str, UUID)
 
-def create_organisation(db: Session, payload):
-    existing = (
-        db.query(Organisation).filter(Organisation.name.ilike(payload.name)).first()
+
+async def create_organisation(db: AsyncSession, payload):
+    existing = await db.scalar(
+        select(Organisation).filter(Organisation.name.ilike(payload.name)).limit(1)
     )
 
     if existing:
@@ -18,17 +23,35 @@ def create_organisation(db: Session, payload):
     org = Organisation(**payload.dict())
 
     db.add(org)
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
     return org
 
 
-def list_organisations(db: Session):
-    return db.query(Organisation).all()
+async def list_organisations(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    organisation_id: Optional[UUID] = None,
+):
+    """One page of organisations ordered by (name, id), optionally
+    filtered by name prefix and id. Returns (organisations, next_cursor)."""
+    q = select(Organisation)
+
+    if name:
+        q = q.filter(Organisation.name.startswith(name, autoescape=True))
+    if organisation_id:
+        q = q.filter(Organisation.id == organisation_id)
+
+    columns = [Organisation.name, Organisation.id]
+    q = keyset_page_query(q, columns, cursor, limit, NAME_ID)
+    rows = (await db.scalars(q)).all()
+    return keyset_page(rows, columns, limit)
 
 
-def get_organisation(db: Session, organisation_id: UUID):
-    org = db.query(Organisation).filter(Organisation.id == organisation_id).first()
+async def get_organisation(db: AsyncSession, organisation_id: UUID):
+    org = await db.get(Organisation, organisation_id)
 
     if not org:
         raise HTTPException(status_code=404, detail="Organisation not found")
@@ -36,19 +59,19 @@ def get_organisation(db: Session, organisation_id: UUID):
     return org
 
 
-def update_organisation(db: Session, organisation_id: UUID, payload):
-    org = get_organisation(db, organisation_id)
+async def update_organisation(db: AsyncSession, organisation_id: UUID, payload):
+    org = await get_organisation(db, organisation_id)
 
     update_data = payload.dict(exclude_unset=True)
 
     if "name" in update_data:
-        existing = (
-            db.query(Organisation)
+        existing = await db.scalar(
+            select(Organisation)
             .filter(
                 Organisation.name.ilike(update_data["name"]),
                 Organisation.id != organisation_id,
             )
-            .first()
+            .limit(1)
         )
 
         if existing:
@@ -60,14 +83,14 @@ def update_organisation(db: Session, organisation_id: UUID, payload):
     for key, value in update_data.items():
         setattr(org, key, value)
 
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
     return org
 
-def delete_organisation(db: Session, organisation_id: UUID):
-    org = get_organisation(db, organisation_id)
+async def delete_organisation(db: AsyncSession, organisation_id: UUID):
+    org = await get_organisation(db, organisation_id)
 
-    db.delete(org)
-    db.commit()
+    await db.delete(org)
+    await db.commit()
 
     return {"message": "Organisation deleted successfully"}
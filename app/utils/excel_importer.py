@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+from openpyxl import load_workbook
+
+SUPPORTED_EXTENSIONS = (".xlsx", ".csv", ".csv.gz")
+
+
+def is_supported_file(filename: str) -> bool:
+    return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def read_rows(fileobj, filename: str) -> Tuple[List[str], Iterator[Tuple[int, dict]]]:
+    """Open an upload for streaming.
+
+    Returns the header columns and an iterator of (row_number, row) pairs,
+    where row_number is the spreadsheet row (the header is row 1). Rows are
+    read one at a time, so memory does not grow with the file size.
+    """
+    name = filename.lower()
+
+    if name.endswith(".csv.gz"):
+        return read_csv_rows(gzip.GzipFile(fileobj=fileobj, mode="rb"))
+    if name.endswith(".csv"):
+        return read_csv_rows(fileobj)
+    return read_xlsx_rows(fileobj)
+
+
+def strip_cell(value):
+    """Surrounding whitespace is dropped from text cells in every format,
+    so a row validates the same from xlsx and csv."""
+    return value.strip() if isinstance(value, str) else value
+
+
+def read_xlsx_rows(fileobj):
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    values = workbook.active.iter_rows(values_only=True)
+
+    header = next(values, None)
+    if header is None:
+        workbook.close()
+        return [], iter(())
+
+    columns = [str(name) if name is not None else "" for name in header]
+
+    def rows():
+        try:
+            for row_number, cells in enumerate(values, start=2):
+                if all(cell is None for cell in cells):
+                    continue
+                cells = [strip_cell(cell) for cell in cells]
+                yield row_number, dict(zip(columns, cells))
+        finally:
+            workbook.close()
+
+    return columns, rows()
+
+
+def read_csv_rows(binary_file):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+
+    header = next(reader, None)
+    if header is None:
+        return [], iter(())
+
+    columns = [name.strip() for name in header]
+
+    def rows():
+        for row_number, cells in enumerate(reader, start=2):
+            cells = [cell.strip() for cell in cells]
+            if not any(cells):
+                continue
+            yield row_number, dict(zip(columns, cells))
+
+    return columns, rows()
+
+
+def iter_chunks(rows, size: int):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
@@ -1,7 +1,28 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Passwords sent to a worker per task, so IPC overhead stays small
+# next to the bcrypt cost.
+HASH_TASK_SIZE = 16
+
+# Default worker count cap: CPU counts see the host, not a container's
+# CPU quota. Set PASSWORD_HASH_WORKERS to go past it.
+MAX_DEFAULT_HASH_WORKERS = 4
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -9,3 +30,164 @@ def hash_password(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (its affinity mask, where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def hash_workers() -> int:
+    if settings.PASSWORD_HASH_WORKERS:
+        return settings.PASSWORD_HASH_WORKERS
+    return min(MAX_DEFAULT_HASH_WORKERS, available_cpus())
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+
+    if _hash_pool is None:
+        # spawn, not fork: the API process has threads running
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=hash_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+
+def hash_many(passwords: List[str]) -> List[Union[str, Exception]]:
+    """Worker task. A failing password is returned as its exception so
+    it does not take down the rest of the task."""
+    results = []
+    for password in passwords:
+        try:
+            results.append(hash_password(password))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def verify_many(pairs: List[Tuple[str, str]]) -> List[Union[bool, Exception]]:
+    """Worker task: (plain, hashed) pairs, same error handling as hash_many."""
+    results = []
+    for plain, hashed in pairs:
+        try:
+            results.append(verify_password(plain, hashed))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def map_in_pool(task: Callable[[list], list], items: Iterable) -> Iterator:
+    """Run task over items on the process pool, HASH_TASK_SIZE items per
+    call, yielding results in input order. At most two tasks per worker
+    are in flight, so a huge input never gets queued all at once."""
+    items = list(items)
+
+    if hash_workers() == 1 or len(items) < settings.PASSWORD_HASH_PARALLEL_MIN:
+        yield from task(items)
+        return
+
+    pool = get_hash_pool()
+    max_in_flight = hash_workers() * 2
+    in_flight = deque()
+
+    for start in range(0, len(items), HASH_TASK_SIZE):
+        if len(in_flight) >= max_in_flight:
+            yield from in_flight.popleft().result()
+        in_flight.append(pool.submit(task, items[start : start + HASH_TASK_SIZE]))
+
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+
+def hash_passwords(passwords: Iterable[str]) -> Iterator[Union[str, Exception]]:
+    """Hash passwords across the process pool, in input order."""
+    return map_in_pool(hash_many, passwords)
+
+
+def verify_passwords(
+    pairs: Iterable[Tuple[str, str]]
+) -> Iterator[Union[bool, Exception]]:
+    """Check (plain, hashed) pairs across the process pool, in input order."""
+    return map_in_pool(verify_many, pairs)
+
+
+class HashingExecutor:
+    """Dedicated threads for the bcrypt work of single requests (bcrypt
+    releases the GIL, so threads hash in parallel).
+
+    At most workers + max_queue calls are admitted at once; the next one
+    is shed with a 503 straight away instead of queueing. So however
+    many logins arrive, they tie up a bounded number of request threads
+    and the rest of the API keeps its threadpool.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def run(self, fn: Callable, *args):
+        """fn(*args) on a hashing thread; blocks until it returns."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                503,
+                "Too many password checks in progress, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        with self._lock:
+            self.admitted += 1
+        submitted = time.perf_counter()
+
+        def call():
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                self.running += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        try:
+            return self._executor.submit(call).result()
+        finally:
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            in_flight = self.admitted - self.completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": in_flight - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
+
+
+hashing_executor = HashingExecutor(
+    settings.PASSWORD_HASH_REQUEST_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE
+)
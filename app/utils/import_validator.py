@@ -0,0 +1,76 @@
+from typing import Any, List, Optional, Set
+
+import pandas as pd
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+ALLOWED_ROLES = {
+    "superadmin",
+    "organisation_admin",
+    "department_manager",
+    "admin",
+    "employee",
+}
+
+REQUIRED_VALUES = ["first_name", "last_name", "age", "email", "password", "role"]
+
+
+def preflight(chunk, seen_emails: Optional[Set[str]] = None):
+    """Validate a chunk of (row_number, row) pairs with vectorized pandas
+    checks, before anything touches the database.
+
+    Covers missing values, email format, integer ages, the role whitelist
+    and emails repeated inside the file. Each row gets its first failing
+    check as its error. Returns (valid_chunk, errors); surviving rows come
+    back with age as int and role normalised. Pass the same seen_emails
+    set for every chunk to catch duplicates across chunks.
+    """
+    if not chunk:
+        return [], []
+
+    row_numbers = [row_number for row_number, _ in chunk]
+    df = pd.DataFrame([row for _, row in chunk], index=row_numbers, dtype=object)
+
+    error = pd.Series(None, index=df.index, dtype=object)
+
+    def flag(mask, message):
+        error[mask & error.isna()] = message
+
+    for col in REQUIRED_VALUES:
+        flag(df[col].isna(), f"Missing value: {col}")
+
+    email = df["email"].astype("string")
+    flag(~email.str.match(EMAIL_PATTERN).fillna(False).astype(bool), "Invalid email format")
+
+    age = pd.to_numeric(df["age"], errors="coerce")
+    flag(age.isna() | (age % 1 != 0) | (age < 0), "Invalid age")
+
+    role = df["role"].astype("string").str.strip().str.lower()
+    flag(~role.isin(ALLOWED_ROLES).fillna(False).astype(bool), "Invalid role")
+
+    # only rows that passed so far count as a first occurrence, so an
+    # invalid row does not shadow a later valid copy of its email
+    passed = error.isna()
+    duplicated = pd.Series(False, index=df.index)
+    duplicated[passed] = email[passed].duplicated(keep="first")
+    if seen_emails is not None:
+        duplicated |= email.isin(seen_emails).fillna(False).astype(bool)
+    flag(duplicated, "Email already exists")
+
+    valid = error.isna()
+    if seen_emails is not None:
+        seen_emails.update(email[valid])
+
+    errors: List[Any] = [
+        {"row": int(row_number), "error": message}
+        for row_number, message in error[~valid].items()
+    ]
+
+    valid_chunk = []
+    for row_number, row in chunk:
+        if valid[row_number]:
+            row["age"] = int(age[row_number])
+            row["role"] = role[row_number]
+            valid_chunk.append((row_number, row))
+
+    return valid_chunk, errors
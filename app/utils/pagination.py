@@ -0,0 +1,88 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Table, text, tuple_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor for the sort key of the last row on a page."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else str(v) for v in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[str], object]]) -> List:
+    """Inverse of encode_cursor; parsers convert each value back."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(parsers):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+
+# Parsers for the usual (timestamp, id) sort key
+TIMESTAMP_ID = (datetime.fromisoformat, UUID)
+
+# Below this many rows (per the estimate) an exact count is cheap enough
+EXACT_COUNT_MAX = 100_000
+
+
+def estimated_count(db: Session, table: Table):
+    """The planner's row estimate for a whole table on PostgreSQL, or
+    None when an exact count should be used instead: other databases,
+    tables never analyzed, and tables small enough to count."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+
+    estimate = db.execute(
+        text(
+            "SELECT CAST(reltuples AS bigint) FROM pg_class "
+            "WHERE oid = CAST(:table AS regclass)"
+        ),
+        {"table": table.name},
+    ).scalar()
+
+    if estimate is None or estimate < EXACT_COUNT_MAX:
+        return None
+    return estimate
+
+
+def keyset_page_query(
+    q, columns: Sequence, cursor: Optional[str], limit: int, parsers
+):
+    """q (a Query or a select()) ordered by columns (ascending),
+    continuing after cursor, limited to one page plus one row for
+    keyset_page to tell whether there is a next page."""
+    q = q.order_by(*columns)
+
+    if cursor:
+        q = q.filter(tuple_(*columns) > tuple(decode_cursor(cursor, parsers)))
+
+    return q.limit(limit + 1)
+
+
+def keyset_page(rows: Sequence, columns: Sequence, limit: int):
+    """Split the rows of keyset_page_query into (rows, next_cursor);
+    next_cursor is None on the last page."""
+    if len(rows) <= limit:
+        return list(rows), None
+
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+
+def keyset_paginate(q, columns: Sequence, cursor: Optional[str], limit: int, parsers):
+    """One page of q ordered by columns (ascending), continuing after
+    cursor. Returns (rows, next_cursor); next_cursor is None on the
+    last page."""
+    rows = keyset_page_query(q, columns, cursor, limit, parsers).all()
+    return keyset_page(rows, columns, limit)
@@ -0,0 +1,146 @@
+"""Benchmark logins and refresh-token rotations: the old flow (SELECT,
+then DELETE and INSERT with a commit each) vs the current one (one
+DELETE ... RETURNING and the INSERT, committed once).
+
+bcrypt is excluded (password checks always pass), so the numbers are
+the database path only. Each flow runs with the activity log buffer
+off (the login log is written in the request) and on.
+
+    python benchmarks/bench_auth.py --count 2000
+    python benchmarks/bench_auth.py --url postgresql+psycopg2://...
+
+The target database gets its tables created and refresh_tokens emptied.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import create_engine, delete  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.models  # noqa: E402,F401
+import app.models.log  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.database.db import Base  # noqa: E402
+from app.models.refresh_token import RefreshToken  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import auth_service  # noqa: E402
+from app.services.log_service import create_log, log_buffer  # noqa: E402
+
+
+def legacy_login(db, email):
+    user = db.query(User).filter(User.email == email).first()
+    create_log(db, user, "Login successful")
+
+    access = auth_service.create_user_access_token(user)
+    refresh = auth_service.create_refresh_token(db, user.id)
+    db.commit()
+    # the response reads user.role after the commit
+    user.role
+    return access, refresh
+
+
+def legacy_refresh(db, refresh_token):
+    auth_service.decode_token(refresh_token)
+
+    db_token = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == auth_service.token_digest(refresh_token))
+        .first()
+    )
+    user = db.query(User).filter(User.id == db_token.user_id).first()
+
+    db.delete(db_token)
+    db.commit()
+
+    auth_service.create_user_access_token(user)
+    refresh = auth_service.create_refresh_token(db, user.id)
+    db.commit()
+    # the response reads user.id after the commit
+    user.id
+    return refresh
+
+
+def current_login(db, email):
+    result = auth_service.login(db, email, "benchmark")
+    return result["access_token"], result["refresh_token"]
+
+
+def current_refresh(db, refresh_token):
+    return auth_service.refresh_access_token(db, refresh_token)["refresh_token"]
+
+
+def run(Session, name, login, refresh, email, count):
+    db = Session()
+    try:
+        db.execute(delete(RefreshToken))
+        db.commit()
+
+        start = time.perf_counter()
+        for _ in range(count):
+            _, token = login(db, email)
+        logins = count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(count):
+            token = refresh(db, token)
+        refreshes = count / (time.perf_counter() - start)
+    finally:
+        db.close()
+
+    print(f"{name:<22} {logins:10.0f} logins/s  {refreshes:10.0f} refreshes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    log_buffer.session_factory = Session
+
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    with Session() as db:
+        db.add(
+            User(
+                first_name="Bench",
+                last_name="User",
+                age=30,
+                email=email,
+                password="not a hash",
+                role="employee",
+            )
+        )
+        db.commit()
+
+    auth_service.verify_password = lambda password, hashed: True
+    # thousands of logins for one email would be refused with 429
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+    print(f"{engine.dialect.name}+{engine.dialect.driver}, {args.count} of each")
+
+    count = args.count
+    for buffered in (False, True):
+        settings.LOG_BUFFER_ENABLED = buffered
+        label = "buffered logs" if buffered else "direct logs"
+        run(Session, f"before, {label}", legacy_login, legacy_refresh, email, count)
+        run(Session, f"after, {label}", current_login, current_refresh, email, count)
+
+    log_buffer.close()
+
+
+if __name__ == "__main__":
+    main()
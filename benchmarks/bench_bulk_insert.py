@@ -0,0 +1,100 @@
+"""Benchmark user inserts: ORM add_all vs the bulk writer.
+
+Hashing is excluded (every row gets the same precomputed hash), so the
+numbers are the write path only.
+
+    python benchmarks/bench_bulk_insert.py --rows 50000
+    python benchmarks/bench_bulk_insert.py --url postgresql+psycopg2://...
+
+The target database gets its tables created and the users table emptied.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import create_engine, delete  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.models  # noqa: E402,F401
+import app.models.log  # noqa: E402,F401
+from app.database.db import Base  # noqa: E402
+from app.database.bulk_writer import bulk_write_users  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.hash import hash_password  # noqa: E402
+
+
+def make_rows(count, password):
+    run = uuid.uuid4().hex[:8]
+    return [
+        {
+            "first_name": "Bench",
+            "last_name": f"User{i}",
+            "age": 30,
+            "email": f"bench_{run}_{i}@example.com",
+            "password": password,
+            "role": "employee",
+            "organisation_id": None,
+            "department_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def orm_insert(db, batch):
+    db.add_all([User(**row) for row in batch])
+    db.flush()
+
+
+def bulk_insert(db, batch):
+    bulk_write_users(db, batch)
+
+
+def run(Session, name, writer, rows, batch_size):
+    db = Session()
+    try:
+        db.execute(delete(User))
+        db.commit()
+
+        start = time.perf_counter()
+        for offset in range(0, len(rows), batch_size):
+            with db.begin_nested():
+                writer(db, rows[offset : offset + batch_size])
+            db.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(f"{name:<12} {len(rows):>8} rows  {elapsed:7.2f}s  {len(rows) / elapsed:10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    password = hash_password("benchmark")
+    print(f"{engine.dialect.name}+{engine.dialect.driver}, batch size {args.batch_size}")
+
+    run(Session, "orm add_all", orm_insert, make_rows(args.rows, password), args.batch_size)
+    run(Session, "bulk writer", bulk_insert, make_rows(args.rows, password), args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
 from app.database.db import Base
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import login_rate_store
+from app.services.log_service import log_buffer
 from app.models.user import User
 from app.utils.hash import hash_password
 from app.services.auth_service import create_access_token
@@ -21,11 +29,28 @@ TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine
 )
 
+# Same file for the async routes. NullPool: TestClient may run each
+# request on a different event loop.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db", poolclass=NullPool
+)
+
+AsyncTestingSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+log_buffer.session_factory = TestingSessionLocal
+
 
 @pytest.fixture(scope="function")
 def db_session():
+    # nothing from the previous test may land in the fresh tables
+    log_buffer.flush()
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    login_rate_store.clear()
 
     db = TestingSessionLocal()
     try:
@@ -34,6 +59,33 @@ def db_session():
         db.close()
 
 
+@pytest.fixture
+def count_statements():
+    """`with count_statements(engine) as log:` records the SQL run on
+    engine inside the block in log.statements, and its commits in
+    log.commits."""
+
+    @contextmanager
+    def count(engine):
+        log = SimpleNamespace(statements=[], commits=0)
+
+        def record(conn, cursor, statement, *args):
+            log.statements.append(statement)
+
+        def record_commit(conn):
+            log.commits += 1
+
+        event.listen(engine, "before_cursor_execute", record)
+        event.listen(engine, "commit", record_commit)
+        try:
+            yield log
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+            event.remove(engine, "commit", record_commit)
+
+    return count
+
+
 @pytest.fixture
 def client(db_session):
     def override_db():
@@ -42,8 +94,13 @@ def client(db_session):
         finally:
             pass
 
-    from app.database.db import get_db
+    async def override_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    from app.database.db import get_db, get_async_db
     app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_async_db] = override_async_db
 
     return TestClient(app)
 
@@ -1,5 +1,7 @@
+
 from app.models.user import User
 from app.utils.hash import hash_password
+from app.services.auth_service import create_access_token
 
 
 def test_login_success(client, db_session):
@@ -48,3 +50,196 @@ def test_login_invalid_password(client, db_session):
 
 
     assert response.status_code == 401
+
+
+
+def test_cached_principal_skips_database(client, db_session, count_statements):
+    user = User(
+        first_name="Cached",
+        last_name="User",
+        age=25,
+        email="cached@test.com",
+        password=hash_password("password123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    with count_statements(db_session.get_bind()) as log:
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "cached@test.com"
+    assert log.statements == []
+
+
+def test_role_change_invalidates_cached_principal(client, db_session, superadmin_token):
+    user = User(
+        first_name="Promoted",
+        last_name="User",
+        age=25,
+        email="promoted@test.com",
+        password=hash_password("password123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "employee"
+
+    response = client.put(
+        f"/api/v1/auth/make-org-admin/{user.id}",
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "organisation_admin"
+
+
+def test_claims_mode_token_is_served_without_database(
+    client, db_session, monkeypatch, count_statements
+):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS_MODE", True)
+
+    user = User(
+        first_name="Claims",
+        last_name="User",
+        age=25,
+        email="claims@test.com",
+        password=hash_password("password123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    token = client.post(
+        "/api/v1/auth/login",
+        data={"username": "claims@test.com", "password": "password123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with count_statements(db_session.get_bind()) as log:
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": str(user.id),
+        "email": "claims@test.com",
+        "role": "employee",
+    }
+    assert log.statements == []
+
+
+def test_claims_mode_token_is_revoked_on_role_change(
+    client, db_session, superadmin_token, monkeypatch
+):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS_MODE", True)
+
+    user = User(
+        first_name="Revoked",
+        last_name="User",
+        age=25,
+        email="revoked@test.com",
+        password=hash_password("password123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    login = client.post(
+        "/api/v1/auth/login",
+        data={"username": "revoked@test.com", "password": "password123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    ).json()
+    headers = {"Authorization": f"Bearer {login['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    response = client.put(
+        f"/api/v1/auth/make-admin/{user.id}",
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+
+    refreshed = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]}
+    ).json()
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "admin"
+
+
+def test_refresh_token_is_stored_hashed_and_rotated(
+    client, db_session, count_statements
+):
+    from app.models.refresh_token import RefreshToken
+    from app.services.auth_service import token_digest
+
+    user = User(
+        first_name="Refresh",
+        last_name="User",
+        age=25,
+        email="refresh@test.com",
+        password=hash_password("password123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    form = {"username": "refresh@test.com", "password": "password123"}
+    tokens = [
+        client.post("/api/v1/auth/login", data=form).json()["refresh_token"]
+        for _ in range(2)
+    ]
+    # issued within the same second, still distinct
+    assert tokens[0] != tokens[1]
+
+    stored = {row.token_hash for row in db_session.query(RefreshToken)}
+    assert stored == {token_digest(token) for token in tokens}
+
+    with count_statements(db_session.get_bind()) as log:
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens[0]})
+
+    assert response.status_code == 200
+    # rotation: one DELETE ... RETURNING and the new token's INSERT
+    assert [statement.split()[0] for statement in log.statements] == [
+        "DELETE",
+        "INSERT",
+    ]
+    assert log.commits == 1
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens[0]})
+    assert response.status_code == 401
+
+    client.post("/api/v1/auth/logout", json={"refresh_token": tokens[1]})
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens[1]})
+    assert response.status_code == 401
+
+
+def test_login_attempts_are_rate_limited(
+    client, db_session, monkeypatch, count_statements
+):
+    from app.core import rate_limit
+
+    email_limiter = rate_limit.login_limiters[0]
+    monkeypatch.setattr(email_limiter, "limit", 2)
+
+    form = {"username": "nobody@test.com", "password": "wrong"}
+    for _ in range(2):
+        assert client.post("/api/v1/auth/login", data=form).status_code == 401
+
+    with count_statements(db_session.get_bind()) as log:
+        response = client.post("/api/v1/auth/login", data=form)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert log.statements == []
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.utils import hash as hash_utils
+from app.utils.hash import HashingExecutor, hash_passwords, verify_password
+
+
+def test_hash_passwords_in_pool_keeps_order(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 2)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_PARALLEL_MIN", 1)
+
+    passwords = ["first", None, "third"]
+    results = list(hash_passwords(passwords))
+
+    assert verify_password("first", results[0])
+    assert isinstance(results[1], Exception)
+    assert verify_password("third", results[2])
+
+
+def test_hash_workers_default_is_capped(monkeypatch):
+    monkeypatch.setattr(hash_utils, "available_cpus", lambda: 64)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    assert hash_utils.hash_workers() == hash_utils.MAX_DEFAULT_HASH_WORKERS
+
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 16)
+    assert hash_utils.hash_workers() == 16
+
+
+def test_hashing_executor_sheds_load_when_full():
+    executor = HashingExecutor(workers=1, max_queue=1)
+    release = threading.Event()
+    callers = [
+        threading.Thread(target=executor.run, args=(release.wait,)) for _ in range(2)
+    ]
+    for caller in callers:
+        caller.start()
+    while executor.metrics()["queued"] < 1:
+        time.sleep(0.01)
+
+    with pytest.raises(HTTPException) as error:
+        executor.run(len, "x")
+    assert error.value.status_code == 503
+
+    release.set()
+    for caller in callers:
+        caller.join()
+
+    assert executor.run(len, "abc") == 3
+    metrics = executor.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["completed"] == 3
+    assert metrics["running"] == metrics["queued"] == 0
+
+
+def test_hashing_slots_must_leave_the_request_threadpool_free():
+    Settings(PASSWORD_HASH_REQUEST_WORKERS=4, PASSWORD_HASH_QUEUE_SIZE=6)
+
+    with pytest.raises(ValidationError, match="quarter of REQUEST_THREADPOOL_SIZE"):
+        Settings(PASSWORD_HASH_REQUEST_WORKERS=4, PASSWORD_HASH_QUEUE_SIZE=16)
+
+    Settings(
+        REQUEST_THREADPOOL_SIZE=80,
+        PASSWORD_HASH_REQUEST_WORKERS=4,
+        PASSWORD_HASH_QUEUE_SIZE=16,
+    )
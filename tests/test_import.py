@@ -0,0 +1,538 @@
+import io
+import time
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.organisation import Organisation
+from app.models.department import Department
+from app.utils.hash import hash_password, verify_password
+
+
+def make_xlsx(rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def user_row(email, **overrides):
+    row = {
+        "first_name": "Import",
+        "last_name": "User",
+        "age": 28,
+        "email": email,
+        "password": "secret123",
+        "organisation_id": None,
+        "department_id": None,
+        "role": "employee",
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.parametrize("batch_size", [1000, 1])
+def test_import_users_reports_row_errors(
+    client, db_session, superadmin_token, monkeypatch, batch_size
+):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", batch_size)
+
+    org = Organisation(name="Import Org")
+    other_org = Organisation(name="Other Org")
+    db_session.add_all([org, other_org])
+    db_session.commit()
+
+    dept = Department(name="Other Dept", organisation_id=other_org.id)
+    db_session.add(dept)
+    db_session.add(
+        User(
+            first_name="Existing",
+            last_name="User",
+            age=40,
+            email="existing@test.com",
+            password=hash_password("pass123"),
+            role="employee",
+        )
+    )
+    db_session.commit()
+
+    rows = [
+        user_row("ok1@test.com", organisation_id=str(org.id)),
+        user_row("bad-org@test.com", organisation_id=str(uuid4())),
+        user_row("existing@test.com"),
+        user_row(
+            "wrong-dept@test.com",
+            organisation_id=str(org.id),
+            department_id=str(dept.id),
+        ),
+        user_row("ok2@test.com"),
+        user_row("ok2@test.com"),
+    ]
+
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success_count"] == 2
+    assert data["failed_count"] == 4
+    assert data["errors"] == [
+        {"row": 3, "error": "Invalid organisation_id"},
+        {"row": 4, "error": "Email already exists"},
+        {"row": 5, "error": "Department does not belong to organisation"},
+        {"row": 7, "error": "Email already exists"},
+    ]
+
+    imported = db_session.query(User).filter(User.email == "ok1@test.com").first()
+    assert imported.organisation_id == org.id
+
+
+def test_import_users_missing_column(client, superadmin_token):
+    rows = [{"first_name": "No", "last_name": "Email"}]
+
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_import_users_bad_row_does_not_roll_back_batch(
+    client, db_session, superadmin_token
+):
+    rows = [
+        user_row("first@test.com"),
+        user_row("no-age@test.com", age=None),
+        user_row("third@test.com"),
+    ]
+
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    data = response.json()
+    assert data["success_count"] == 2
+    assert [error["row"] for error in data["errors"]] == [3]
+    assert db_session.query(User).filter(User.email == "third@test.com").count() == 1
+
+
+def test_import_users_from_gzipped_csv(client, db_session, superadmin_token):
+    buffer = io.BytesIO()
+    pd.DataFrame(
+        [user_row("csv1@test.com"), user_row("csv2@test.com", age="abc")]
+    ).to_csv(buffer, index=False, compression="gzip")
+    buffer.seek(0)
+
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.csv.gz", buffer)},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    data = response.json()
+    assert data["success_count"] == 1
+    assert [error["row"] for error in data["errors"]] == [3]
+    assert db_session.query(User).filter(User.email == "csv1@test.com").count() == 1
+
+
+@pytest.mark.parametrize("filename", ["users.xlsx", "users.csv", "users.csv.gz"])
+def test_import_users_accepts_padded_cells_in_every_format(
+    client, db_session, superadmin_token, filename
+):
+    rows = pd.DataFrame([user_row(" padded@test.com ", first_name=" Padded ")])
+    buffer = io.BytesIO()
+    if filename.endswith(".xlsx"):
+        rows.to_excel(buffer, index=False)
+    else:
+        compression = "gzip" if filename.endswith(".gz") else None
+        rows.to_csv(buffer, index=False, compression=compression)
+    buffer.seek(0)
+
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": (filename, buffer)},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    data = response.json()
+    assert data["success_count"] == 1, data["errors"]
+    user = db_session.query(User).filter(User.email == "padded@test.com").one()
+    assert user.first_name == "Padded"
+
+
+def test_import_users_rejects_unknown_extension(client, superadmin_token):
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.txt", io.BytesIO(b"first_name\n"))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_import_users_dry_run(client, db_session, superadmin_token, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+
+    rows = [
+        user_row("dry1@test.com", role="Employee"),
+        user_row("not-an-email"),
+        user_row("dry2@test.com", role="ceo"),
+        user_row("dry3@test.com", age="twenty"),
+        user_row("dry1@test.com"),
+    ]
+
+    response = client.post(
+        "/api/v1/import/users?dry_run=true",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    data = response.json()
+    assert data["success_count"] == 1
+    assert data["errors"] == [
+        {"row": 3, "error": "Invalid email format"},
+        {"row": 4, "error": "Invalid role"},
+        {"row": 5, "error": "Invalid age"},
+        {"row": 6, "error": "Email already exists"},
+    ]
+    assert db_session.query(User).filter(User.email == "dry1@test.com").count() == 0
+
+
+@pytest.fixture
+def job_env(monkeypatch, tmp_path):
+    from app.services import import_job_service
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(import_job_service, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "IMPORT_JOB_DIR", str(tmp_path))
+
+
+def wait_for_job(client, job_id, headers):
+    for _ in range(100):
+        job = client.get(f"/api/v1/import/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    return job
+
+
+def test_import_job_runs_in_background(client, superadmin_token, job_env):
+    rows = [user_row("job1@test.com"), user_row("job1@test.com")]
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    response = client.post(
+        "/api/v1/import/users/jobs",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers=headers,
+    )
+    assert response.status_code == 202
+
+    job = wait_for_job(client, response.json()["id"], headers)
+
+    assert job["status"] == "completed"
+    assert job["rows_done"] == 2
+    assert job["success_count"] == 1
+    assert job["failed_count"] == 1
+
+    report = client.get(f"/api/v1/import/jobs/{job['id']}/errors", headers=headers)
+    assert report.status_code == 200
+    assert report.text.splitlines() == ["row,error", "3,Email already exists"]
+
+
+def test_import_job_resumes_after_last_committed_chunk(
+    client, db_session, superadmin_token, job_env, monkeypatch
+):
+    from app.services import import_service
+
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+    rows = [user_row(f"resume{i}@test.com") for i in range(5)]
+    content = make_xlsx(rows).getvalue()
+
+    write_batch = import_service.write_batch
+    calls = []
+
+    def crash_on_second_chunk(db, batch, errors):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError("worker evicted")
+        return write_batch(db, batch, errors)
+
+    monkeypatch.setattr(import_service, "write_batch", crash_on_second_chunk)
+
+    response = client.post(
+        "/api/v1/import/users/jobs",
+        files={"file": ("users.xlsx", io.BytesIO(content))},
+        headers=headers,
+    )
+    job = wait_for_job(client, response.json()["id"], headers)
+    assert job["status"] == "failed"
+    assert job["success_count"] == 2
+
+    response = client.post(
+        "/api/v1/import/users/jobs",
+        files={"file": ("users.xlsx", io.BytesIO(content))},
+        headers=headers,
+    )
+    assert response.json()["id"] == job["id"]
+
+    job = wait_for_job(client, job["id"], headers)
+    assert job["status"] == "completed"
+    assert job["rows_done"] == 5
+    assert job["success_count"] == 5
+    assert job["failed_count"] == 0
+    assert calls == [2, 2, 2, 1]
+    assert db_session.query(User).filter(User.email.like("resume%")).count() == 5
+
+
+def test_concurrent_upload_of_same_file_gets_409(
+    client, db_session, superadmin_token, job_env, monkeypatch
+):
+    import hashlib
+
+    from app.models.import_job import ImportJob
+    from app.services import import_job_service
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+    content = make_xlsx([user_row("race@test.com")]).getvalue()
+    admin = db_session.query(User).filter(User.role == "superadmin").first()
+    db_session.add(
+        ImportJob(
+            filename="users.xlsx",
+            created_by=admin.id,
+            mode="insert",
+            file_hash=hashlib.sha256(content).hexdigest(),
+            status="running",
+        )
+    )
+    db_session.commit()
+
+    # both uploads looked before either job existed
+    monkeypatch.setattr(import_job_service, "find_resumable_job", lambda *a: None)
+    response = client.post(
+        "/api/v1/import/users/jobs",
+        files={"file": ("users.xlsx", io.BytesIO(content))},
+        headers=headers,
+    )
+
+    assert response.status_code == 409
+    assert db_session.query(ImportJob).count() == 1
+
+
+def test_import_users_upsert(client, db_session, superadmin_token):
+    db_session.add_all(
+        [
+            User(
+                first_name="Same",
+                last_name="User",
+                age=28,
+                email="same@test.com",
+                password=hash_password("secret123"),
+                role="employee",
+            ),
+            User(
+                first_name="Old",
+                last_name="Name",
+                age=28,
+                email="renamed@test.com",
+                password=hash_password("secret123"),
+                role="employee",
+            ),
+            User(
+                first_name="Import",
+                last_name="User",
+                age=28,
+                email="newpass@test.com",
+                password=hash_password("oldpass"),
+                role="employee",
+            ),
+        ]
+    )
+    db_session.commit()
+    same_hash = (
+        db_session.query(User).filter(User.email == "same@test.com").one().password
+    )
+
+    rows = [
+        user_row("same@test.com", first_name="Same"),
+        user_row("renamed@test.com", first_name="New"),
+        user_row("newpass@test.com"),
+        user_row("brand-new@test.com"),
+    ]
+
+    response = client.post(
+        "/api/v1/import/users?mode=upsert",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+
+    data = response.json()
+    assert data["errors"] == []
+    assert data["success_count"] == 4
+    assert data["inserted_count"] == 1
+    assert data["updated_count"] == 2
+    assert data["unchanged_count"] == 1
+
+    db_session.expire_all()
+    users = {user.email: user for user in db_session.query(User).all()}
+    assert users["same@test.com"].password == same_hash
+    assert users["renamed@test.com"].first_name == "New"
+    assert verify_password("secret123", users["newpass@test.com"].password)
+    assert users["brand-new@test.com"].first_name == "Import"
+
+
+def test_import_upsert_revokes_tokens_with_changed_claims(
+    client, db_session, superadmin_token, monkeypatch
+):
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS_MODE", True)
+    org = Organisation(name="Umbrella")
+    db_session.add(org)
+    db_session.commit()
+
+    db_session.add_all(
+        [
+            User(
+                first_name="Demoted",
+                last_name="Admin",
+                age=40,
+                email="demoted@test.com",
+                password=hash_password("secret123"),
+                role="organisation_admin",
+                organisation_id=org.id,
+            ),
+            User(
+                first_name="Old",
+                last_name="Name",
+                age=28,
+                email="renamed@test.com",
+                password=hash_password("secret123"),
+                role="employee",
+                organisation_id=org.id,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    token = client.post(
+        "/api/v1/auth/login",
+        data={"username": "demoted@test.com", "password": "secret123"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    placed = {"organisation_id": str(org.id)}
+    rows = [
+        user_row("demoted@test.com", role="employee", **placed),
+        user_row("renamed@test.com", first_name="New", **placed),
+    ]
+    response = client.post(
+        "/api/v1/import/users?mode=upsert",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert response.json()["updated_count"] == 2
+
+    db_session.expire_all()
+    users = {user.email: user for user in db_session.query(User).all()}
+    assert users["demoted@test.com"].token_version == 1
+    assert users["renamed@test.com"].token_version == 0
+
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+
+
+def test_import_users_updates_headcounts(client, db_session, superadmin_token):
+    org = Organisation(name="Initech")
+    db_session.add(org)
+    db_session.commit()
+    sales = Department(name="Sales", organisation_id=org.id)
+    support = Department(name="Support", organisation_id=org.id)
+    db_session.add_all([sales, support])
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+    placed = {"organisation_id": str(org.id), "department_id": str(sales.id)}
+
+    rows = [
+        user_row("one@initech.com", **placed),
+        user_row("two@initech.com", **placed),
+        user_row("three@initech.com", **placed, age="not a number"),
+    ]
+    response = client.post(
+        "/api/v1/import/users",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers=headers,
+    )
+    assert response.json()["success_count"] == 2
+
+    # one user moves to support, the other stays
+    rows = [
+        user_row("one@initech.com", **{**placed, "department_id": str(support.id)}),
+        user_row("two@initech.com", **placed),
+    ]
+    response = client.post(
+        "/api/v1/import/users?mode=upsert",
+        files={"file": ("users.xlsx", make_xlsx(rows))},
+        headers=headers,
+    )
+    assert response.json()["updated_count"] == 1
+
+    db_session.expire_all()
+    assert org.employees_count == 2
+    assert sales.employees_count == 1
+    assert support.employees_count == 1
+
+
+def test_preflight_invalid_first_copy_does_not_reject_valid_duplicate():
+    from app.utils.import_validator import preflight
+
+    chunk = [
+        (2, user_row("dup@test.com", age="not a number")),
+        (3, user_row("dup@test.com")),
+        (4, user_row("dup@test.com")),
+    ]
+
+    valid, errors = preflight(chunk, seen_emails=set())
+
+    assert [row_number for row_number, _ in valid] == [3]
+    assert errors == [
+        {"row": 2, "error": "Invalid age"},
+        {"row": 4, "error": "Email already exists"},
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [2, 1])
+def test_write_batch_reports_email_taken_after_validation(db_session, batch_size):
+    from app.services.import_service import write_batch
+
+    db_session.add(
+        User(
+            first_name="Taken",
+            last_name="User",
+            age=28,
+            email="taken@test.com",
+            password="hash",
+            role="employee",
+        )
+    )
+    db_session.commit()
+
+    rows = [user_row("taken@test.com"), user_row("fresh@test.com")]
+    batch = list(enumerate(rows, start=2))
+    errors, written = [], 0
+    for start in range(0, len(batch), batch_size):
+        written += write_batch(db_session, batch[start : start + batch_size], errors)
+    db_session.commit()
+
+    assert written == 1
+    assert errors == [{"row": 2, "error": "Email already exists"}]
+    assert db_session.query(User).filter(User.email == "fresh@test.com").count() == 1
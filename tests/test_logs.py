@@ -0,0 +1,201 @@
+from app.models.log import ActivityLog
+from app.models.user import User
+from app.services.log_buffer import LogBuffer
+from app.services.log_service import create_log, log_buffer
+from app.utils.hash import hash_password
+from tests.conftest import TestingSessionLocal
+
+
+def make_user(db_session, email):
+    user = User(
+        first_name="Log",
+        last_name="User",
+        age=30,
+        email=email,
+        password=hash_password("pass123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def actions(db_session):
+    db_session.expire_all()
+    return sorted(log.action for log in db_session.query(ActivityLog))
+
+
+def test_logs_are_written_behind_the_request(client, db_session, superadmin_token):
+    user = make_user(db_session, "buffered@test.com")
+
+    response = client.put(
+        f"/api/v1/users/{user.id}",
+        json={"first_name": "Renamed"},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert response.status_code == 200
+
+    log_buffer.flush()
+    assert actions(db_session) == ["Updated user buffered@test.com"]
+
+
+def test_durable_log_is_committed_before_returning(db_session):
+    user = make_user(db_session, "durable@test.com")
+
+    create_log(db_session, user, "Buffered")
+    create_log(db_session, user, "Durable", durable=True)
+
+    assert actions(db_session) == ["Durable"]
+
+    log_buffer.flush()
+    assert actions(db_session) == ["Buffered", "Durable"]
+
+
+def test_full_buffer_applies_backpressure(db_session):
+    buffer = LogBuffer(
+        TestingSessionLocal,
+        max_size=2,
+        batch_size=100,
+        flush_interval=60,
+        put_timeout=0.01,
+    )
+    try:
+        assert buffer.add({"action": "one"})
+        assert buffer.add({"action": "two"})
+        assert not buffer.add({"action": "three"})
+        assert len(buffer) == 2
+    finally:
+        buffer.close()
+
+    assert actions(db_session) == ["one", "two"]
+
+
+def test_logs_keyset_pagination(client, db_session, superadmin_token):
+    from datetime import datetime, timedelta
+
+    base = datetime(2026, 1, 1)
+    # two entries share each timestamp, so the id has to break ties
+    for i in range(7):
+        timestamp = base + timedelta(minutes=i // 2)
+        db_session.add(ActivityLog(action=f"event {i}", timestamp=timestamp))
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+    expected = [
+        log.action
+        for log in db_session.query(ActivityLog).order_by(
+            ActivityLog.timestamp.desc(), ActivityLog.id.desc()
+        )
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/v1/logs/", params=params, headers=headers).json()
+        seen += [log["action"] for log in body["logs"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == expected
+
+    legacy = client.get("/api/v1/logs/", params={"page": 2, "limit": 3}, headers=headers)
+    assert [log["action"] for log in legacy.json()["logs"]] == expected[3:6]
+
+    bad = client.get("/api/v1/logs/", params={"cursor": "nope"}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_org_admin_logs_are_scoped_and_filtered(client, db_session, superadmin_token):
+    from app.models.organisation import Organisation
+    from app.services.auth_service import create_access_token
+
+    acme, globex = Organisation(name="Acme"), Organisation(name="Globex")
+    db_session.add_all([acme, globex])
+    db_session.commit()
+
+    admin = make_user(db_session, "orgadmin@acme.com")
+    admin.role = "organisation_admin"
+    admin.organisation_id = acme.id
+    db_session.commit()
+
+    create_log(db_session, admin, "Updated user a@acme.com")
+    create_log(db_session, admin, "Deleted user b@acme.com")
+    db_session.add(
+        ActivityLog(action="Updated user c@globex.com", organisation_id=globex.id)
+    )
+    db_session.commit()
+    log_buffer.flush()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(admin.id)})}"}
+
+    body = client.get("/api/v1/logs/", headers=headers).json()
+    assert sorted(log["action"] for log in body["logs"]) == [
+        "Deleted user b@acme.com",
+        "Updated user a@acme.com",
+    ]
+
+    body = client.get(
+        "/api/v1/logs/", params={"action": "Updated"}, headers=headers
+    ).json()
+    assert [log["action"] for log in body["logs"]] == ["Updated user a@acme.com"]
+
+    response = client.get(
+        "/api/v1/logs/", params={"organisation_id": str(globex.id)}, headers=headers
+    )
+    assert response.status_code == 403
+
+    body = client.get(
+        "/api/v1/logs/",
+        params={"organisation_id": str(globex.id)},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    ).json()
+    assert [log["action"] for log in body["logs"]] == ["Updated user c@globex.com"]
+
+
+def test_partition_months():
+    from datetime import date
+
+    from app.maintenance.activity_log_partitions import add_months, partition_name
+
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert partition_name(date(2027, 2, 1)) == "activity_logs_2027_02"
+
+
+def test_export_logs_streams_ndjson_and_gzipped_csv(
+    client, db_session, superadmin_token
+):
+    import csv
+    import gzip
+    import io
+    import json
+    from datetime import datetime, timedelta
+
+    base = datetime(2026, 1, 1)
+    actions = [f"{'Login' if i % 2 else 'Updated'} {i}" for i in range(5)]
+    for i, action in enumerate(actions):
+        db_session.add(ActivityLog(action=action, timestamp=base + timedelta(hours=i)))
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    response = client.get(
+        "/api/v1/logs/export", params={"action": "Updated"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["action"] for line in lines] == actions[::2]
+    assert lines[0]["timestamp"] == "2026-01-01T00:00:00"
+
+    response = client.get(
+        "/api/v1/logs/export", params={"format": "csv", "gzip": True}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('activity_logs.csv.gz"')
+    text = gzip.decompress(response.content).decode()
+    assert [row["action"] for row in csv.DictReader(io.StringIO(text))] == actions
+
+    bad = client.get("/api/v1/logs/export", params={"format": "xml"}, headers=headers)
+    assert bad.status_code == 400
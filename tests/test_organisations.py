@@ -0,0 +1,238 @@
+from app.models.department import Department
+from app.models.organisation import Organisation
+from app.models.user import User
+from app.services.auth_service import create_access_token
+from app.utils.hash import hash_password
+
+
+def test_create_and_list_organisations(client, superadmin_token):
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    response = client.post(
+        "/api/v1/organisations/",
+        json={"name": "Acme", "address": "1 Road"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    org_id = response.json()["id"]
+
+    response = client.get("/api/v1/organisations/", headers=headers)
+    assert response.status_code == 200
+    assert [org["id"] for org in response.json()] == [org_id]
+
+    response = client.post(
+        "/api/v1/organisations/", json={"name": "acme"}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+def test_async_routes_use_only_the_async_session(client, superadmin_token, monkeypatch):
+    from app.core.principal_cache import principal_cache
+    from app.database.db import get_db
+    from app.main import app
+
+    def no_sync_db():
+        raise AssertionError("async route opened a sync session")
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, no_sync_db)
+    principal_cache.clear()
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    response = client.post(
+        "/api/v1/organisations/", json={"name": "Initech"}, headers=headers
+    )
+    assert response.status_code == 200
+    org_id = response.json()["id"]
+
+    response = client.post(
+        "/api/v1/departments/",
+        json={"name": "IT", "organisation_id": org_id},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get(
+        "/api/v1/departments/", params={"organisation_id": org_id}, headers=headers
+    )
+    assert [dept["name"] for dept in response.json()] == ["IT"]
+
+
+def test_assign_and_remove_department_manager(client, db_session, superadmin_token):
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    org = Organisation(name="Globex")
+    db_session.add(org)
+    db_session.commit()
+
+    user = User(
+        first_name="Dept",
+        last_name="Manager",
+        age=40,
+        email="manager@globex.com",
+        password=hash_password("secret123"),
+        role="employee",
+        organisation_id=org.id,
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post(
+        "/api/v1/departments/",
+        json={"name": "Sales", "organisation_id": str(org.id)},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    dept_id = response.json()["id"]
+
+    response = client.put(
+        f"/api/v1/departments/{dept_id}/assign-manager/{user.id}", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["manager_id"] == str(user.id)
+
+    db_session.refresh(user)
+    assert user.role == "department_manager"
+
+    response = client.put(
+        f"/api/v1/departments/{dept_id}/remove-manager", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["manager_id"] is None
+
+    db_session.refresh(user)
+    assert user.role == "employee"
+
+
+def test_list_organisations_pages_and_filters(client, db_session, superadmin_token):
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    names = ["Beta", "Alpha", "Alpine", "Gamma", "Al_pha"]
+    db_session.add_all([Organisation(name=name) for name in names])
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/organisations/", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [org["name"] for org in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(names)
+
+    response = client.get(
+        "/api/v1/organisations/", params={"name": "Al_"}, headers=headers
+    )
+    assert [org["name"] for org in response.json()] == ["Al_pha"]
+
+
+def test_list_departments_is_scoped(client, db_session, superadmin_token):
+    acme, globex = Organisation(name="Acme"), Organisation(name="Globex")
+    db_session.add_all([acme, globex])
+    db_session.commit()
+
+    db_session.add_all(
+        [
+            Department(name="Sales", organisation_id=acme.id),
+            Department(name="Support", organisation_id=acme.id),
+            Department(name="Sales", organisation_id=globex.id),
+        ]
+    )
+    employee = User(
+        first_name="Emp",
+        last_name="Loyee",
+        age=30,
+        email="emp@acme.com",
+        password=hash_password("secret123"),
+        role="employee",
+        organisation_id=acme.id,
+    )
+    db_session.add(employee)
+    db_session.commit()
+
+    assert client.get("/api/v1/departments/").status_code in (401, 403)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(employee.id)})}"}
+    response = client.get("/api/v1/departments/", headers=headers)
+    assert response.status_code == 200
+    assert {dept["organisation_id"] for dept in response.json()} == {str(acme.id)}
+    assert len(response.json()) == 2
+
+    response = client.get(
+        "/api/v1/departments/",
+        params={"organisation_id": str(globex.id)},
+        headers=headers,
+    )
+    assert response.status_code == 403
+
+    response = client.get(
+        "/api/v1/departments/",
+        params={"name": "Sa", "organisation_id": str(globex.id)},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert [dept["organisation_id"] for dept in response.json()] == [str(globex.id)]
+
+
+def test_headcounts_follow_user_changes(client, db_session, superadmin_token):
+    from app.maintenance.headcounts import run as repair_headcounts
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+
+    org = Organisation(name="Hooli")
+    db_session.add(org)
+    db_session.commit()
+    sales = Department(name="Sales", organisation_id=org.id)
+    support = Department(name="Support", organisation_id=org.id)
+    db_session.add_all([sales, support])
+    db_session.commit()
+
+    user_ids = []
+    for n in range(3):
+        response = client.post(
+            "/api/v1/users/",
+            json={
+                "first_name": "Head",
+                "last_name": "Count",
+                "age": 30,
+                "email": f"head{n}@hooli.com",
+                "password": "secret123",
+                "organisation_id": str(org.id),
+                "department_id": str(sales.id),
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+        user_ids.append(response.json()["id"])
+
+    response = client.put(
+        f"/api/v1/users/{user_ids[0]}",
+        json={"department_id": str(support.id)},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.put(
+        f"/api/v1/departments/{support.id}/assign-manager/{user_ids[1]}",
+        headers=headers,
+    )
+    assert response.json()["employees_count"] == 2
+
+    response = client.delete(f"/api/v1/users/{user_ids[2]}", headers=headers)
+    assert response.status_code == 200
+
+    db_session.expire_all()
+    assert org.employees_count == 2
+    assert sales.employees_count == 0
+    assert support.employees_count == 2
+
+    # drift is corrected by the repair command
+    org.employees_count = 7
+    db_session.commit()
+    assert repair_headcounts(db_session.get_bind(), dry_run=True) == {
+        "organisations": 1,
+        "departments": 0,
+    }
+    repair_headcounts(db_session.get_bind())
+    db_session.expire_all()
+    assert org.employees_count == 2
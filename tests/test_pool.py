@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+
+from app.database.db import get_db
+from app.database.pool import InstrumentedQueuePool, pool_metrics
+from app.main import app
+
+
+def test_pool_counts_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    held = engine.connect()
+    assert pool_metrics(engine)["checked_out"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    metrics = pool_metrics(engine)
+    assert metrics["waits"] == 1
+    assert metrics["timeouts"] == 1
+    assert metrics["max_wait_seconds"] >= 0.05
+
+    held.close()
+    assert pool_metrics(engine)["checked_out"] == 0
+    engine.dispose()
+
+
+def test_db_pool_metrics_require_superadmin(client, superadmin_token):
+    response = client.get(
+        "/api/v1/admin/db-pool",
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert response.status_code == 200
+    assert "checked_out" in response.json()["sync"]
+
+    assert client.get("/api/v1/admin/db-pool").status_code in (401, 403)
+
+
+def test_readiness_probe(client, tmp_path, monkeypatch):
+    assert client.get("/ready").json() == {"status": "ready", "database": "ok"}
+
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path}/missing/x.db"))
+
+    def override_db():
+        db = broken()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # restored on teardown, so later tests get the working database back
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_db)
+    assert client.get("/ready").status_code == 503
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import rate_limit
+from app.core.rate_limit import (
+    MemoryRateLimitStore,
+    SlidingWindowLimiter,
+    SQLiteRateLimitStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryRateLimitStore(max_keys=100)
+    return SQLiteRateLimitStore(str(tmp_path / "rate_limits.db"))
+
+
+def test_sliding_window_limiter(store):
+    limiter = SlidingWindowLimiter(store, "test", limit=3, window=60)
+
+    assert [limiter.hit("a", now=600) for _ in range(3)] == [None] * 3
+    # room again 20s into the next window: 3 * 40 / 60 + 1 <= 3
+    assert limiter.hit("a", now=610) == 70
+    assert limiter.hit("b", now=610) is None
+
+    # half of the previous window still counts: 3 * 0.5 + 1 < 3
+    assert limiter.hit("a", now=690) is None
+    # room again once the previous window weighs 1: 3 * 20 / 60 + 1 + 1
+    assert limiter.hit("a", now=690) == 10
+    # refused attempts are not counted
+    assert store.get("test:a", 11) == (3, 1)
+
+    assert limiter.hit("a", now=780) is None
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    first = SlidingWindowLimiter(SQLiteRateLimitStore(path), "test", 2, 60)
+    second = SlidingWindowLimiter(SQLiteRateLimitStore(path), "test", 2, 60)
+
+    assert first.hit("a", now=600) is None
+    assert second.hit("a", now=600) is None
+    assert first.hit("a", now=600) is not None
+
+
+@pytest.mark.parametrize("limit, window", [(3, 60), (5, 300), (1, 10)])
+def test_retry_after_is_when_the_window_has_room(store, limit, window):
+    limiter = SlidingWindowLimiter(store, "test", limit=limit, window=window)
+    now = 10 * window + 0.25
+
+    for step in range(3 * limit):
+        retry_after = limiter.hit("a", now=now)
+        if retry_after is None:
+            now += window / (2 * limit)
+            continue
+
+        assert limiter.check("a", now=now + retry_after - 1) is not None
+        assert limiter.check("a", now=now + retry_after) is None
+        now += retry_after
+
+
+def test_refused_login_is_not_counted_against_the_email(monkeypatch):
+    email_limiter, ip_limiter = rate_limit.login_limiters
+    monkeypatch.setattr(ip_limiter, "limit", 1)
+
+    rate_limit.check_login_rate("first@test.com", "10.0.0.1")
+    for _ in range(email_limiter.limit + 1):
+        with pytest.raises(HTTPException) as refused:
+            rate_limit.check_login_rate("victim@test.com", "10.0.0.1")
+        assert refused.value.status_code == 429
+
+    assert email_limiter.check("victim@test.com") is None
+    rate_limit.check_login_rate("victim@test.com", "10.0.0.2")
+
+
+def test_sqlite_store_counts_concurrent_adds_atomically(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    stores = [SQLiteRateLimitStore(path) for _ in range(4)]
+    seen = []
+
+    def add_many(store):
+        for _ in range(50):
+            seen.append(store.add("a", 10, 1e12)[1])
+
+    threads = [threading.Thread(target=add_many, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # every add saw its own count, none an inflated one
+    assert sorted(seen) == list(range(1, 201))
@@ -113,3 +113,127 @@ def test_delete_user(client, db_session, superadmin_token):
     )
 
     assert response.status_code == 404
+
+
+def test_list_users_keyset_pagination(client, db_session, superadmin_token):
+    from datetime import datetime
+
+    created_at = datetime(2026, 1, 1)
+    for i in range(6):
+        db_session.add(
+            User(
+                first_name=f"Page{i}",
+                last_name="User",
+                age=30,
+                email=f"page{i}@test.com",
+                password="x",
+                role="employee",
+                # all at the same instant: the id has to break ties
+                created_at=created_at,
+            )
+        )
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {superadmin_token}"}
+    expected = [
+        user.email for user in db_session.query(User).order_by(User.created_at, User.id)
+    ]
+
+    response = client.get(
+        "/api/v1/users", params={"limit": 4, "include_total": True}, headers=headers
+    )
+    assert response.headers["X-Total-Count"] == "7"
+    assert response.headers["X-Total-Count-Exact"] == "true"
+    seen = [user["email"] for user in response.json()]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/api/v1/users", params={"limit": 4, "cursor": cursor}, headers=headers
+    )
+    assert "X-Next-Cursor" not in response.headers
+    seen += [user["email"] for user in response.json()]
+
+    assert seen == expected
+
+
+def test_search_users(client, db_session, superadmin_token):
+    from app.models.organisation import Organisation
+    from app.services.auth_service import create_access_token
+
+    acme, globex = Organisation(name="Acme"), Organisation(name="Globex")
+    db_session.add_all([acme, globex])
+    db_session.commit()
+
+    def add(first_name, email, age, org, role="employee"):
+        user = User(
+            first_name=first_name,
+            last_name="Search",
+            age=age,
+            email=email,
+            password="x",
+            role=role,
+            organisation_id=org.id,
+        )
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    add("Maria", "maria@acme.com", 30, acme)
+    add("Mario", "mario@globex.com", 50, globex)
+    add("Bob", "bob_mari@acme.com", 41, acme)
+    admin = add("Olga", "olga@acme.com", 35, acme, role="organisation_admin")
+
+    def search(token, **params):
+        response = client.get(
+            "/api/v1/users/search",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200, response.text
+        return sorted(user["email"] for user in response.json())
+
+    assert search(superadmin_token, q="MARI") == [
+        "bob_mari@acme.com",
+        "maria@acme.com",
+        "mario@globex.com",
+    ]
+    assert search(superadmin_token, q="mari", min_age=40, max_age=45) == [
+        "bob_mari@acme.com"
+    ]
+    assert search(superadmin_token, q="o_m") == []
+
+    admin_token = create_access_token({"sub": str(admin.id)})
+    assert search(admin_token, q="mari") == ["bob_mari@acme.com", "maria@acme.com"]
+
+    short = client.get(
+        "/api/v1/users/search",
+        params={"q": "ma"},
+        headers={"Authorization": f"Bearer {superadmin_token}"},
+    )
+    assert short.status_code == 422
+
+
+def test_list_users_for_deleted_cached_employee(client, db_session):
+    from app.services.auth_service import create_access_token
+
+    user = User(
+        first_name="Gone",
+        last_name="Soon",
+        age=30,
+        email="gone@test.com",
+        password=hash_password("secret123"),
+        role="employee",
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    assert len(client.get("/api/v1/users", headers=headers).json()) == 1
+
+    # deleted behind the principal cache's back
+    db_session.delete(user)
+    db_session.commit()
+
+    response = client.get("/api/v1/users", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []